@@ -8,15 +8,55 @@ This package provides functions for:
 - Calling C and C++ code.
 """
 
-from amk_testhelpers.cpp.cpphelpers import(callC, callCPP, callCFunction, callCPPFunction)
-from amk_testhelpers.dotnet.dotnethelpers import (callDotNet,callDotNetFunction,dotNetNumbersFormat)
+from amk_testhelpers._process import (
+    ProcessOutput,
+    run_in_background,
+    set_max_background_workers
+)
+from amk_testhelpers.cpp.cpphelpers import(
+    callC,
+    callCPP,
+    callCFunction,
+    callCPPFunction,
+    callC_batch,
+    callCPP_batch,
+    callCFunction_batch,
+    callCPPFunction_batch,
+    acallC,
+    callC_stream,
+    build_c,
+    build_cpp,
+    CProgram,
+    build_c_project,
+    build_cpp_project,
+    CHarness
+)
+from amk_testhelpers.dotnet.dotnethelpers import (
+    callDotNet,
+    callDotNetFunction,
+    dotNetNumbersFormat,
+    callDotNet_batch,
+    callDotNetFunction_batch,
+    acallDotNet,
+    callDotNet_stream,
+    stop_dotnet_build_servers,
+    build_dotnet,
+    DotNetProgram
+)
 from amk_testhelpers.python.pythonhelpers import (
     callpython,
     callpythoncode,
     callpythonmaincode,
     callpython_subprocess,
     load_python_code,
-    loadmycode
+    loadmycode,
+    start_python_workers,
+    stop_python_workers,
+    callpython_batch,
+    acallpython,
+    acallpythoncode,
+    callpython_future,
+    callpython_stream
 )
 
 
@@ -34,4 +74,33 @@ __all__ = [
     'callpythonmaincode', 
     'callpython_subprocess', 
     'load_python_code', 
-    'loadmycode']
\ No newline at end of file
+    'loadmycode',
+    'start_python_workers',
+    'stop_python_workers',
+    'callpython_batch',
+    'callC_batch',
+    'callCPP_batch',
+    'callCFunction_batch',
+    'callCPPFunction_batch',
+    'callDotNet_batch',
+    'callDotNetFunction_batch',
+    'acallpython',
+    'acallpythoncode',
+    'acallC',
+    'acallDotNet',
+    'callpython_future',
+    'run_in_background',
+    'set_max_background_workers',
+    'callpython_stream',
+    'callC_stream',
+    'callDotNet_stream',
+    'ProcessOutput',
+    'build_c',
+    'build_cpp',
+    'CProgram',
+    'build_c_project',
+    'build_cpp_project',
+    'CHarness',
+    'stop_dotnet_build_servers',
+    'build_dotnet',
+    'DotNetProgram']
\ No newline at end of file
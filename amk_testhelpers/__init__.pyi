@@ -1,12 +1,41 @@
+from ._process import(ProcessOutput as ProcessOutput,
+                      run_in_background as run_in_background,
+                      set_max_background_workers as set_max_background_workers)
 from .cpp.cpphelpers import(callC as callC,
                             callCFunction as callCFunction,
                             callCPP as callCPP,
-                            callCPPFunction as callCPPFunction)
+                            callCPPFunction as callCPPFunction,
+                            callC_batch as callC_batch,
+                            callCPP_batch as callCPP_batch,
+                            callCFunction_batch as callCFunction_batch,
+                            callCPPFunction_batch as callCPPFunction_batch,
+                            acallC as acallC,
+                            callC_stream as callC_stream,
+                            build_c as build_c,
+                            build_cpp as build_cpp,
+                            CProgram as CProgram,
+                            build_c_project as build_c_project,
+                            build_cpp_project as build_cpp_project,
+                            CHarness as CHarness)
 from .dotnet.dotnethelpers import(callDotNet as callDotNet, 
-                                  callDotNetFunction as callDotNetFunction, dotNetNumbersFormat as dotNetNumbersFormat)
+                                  callDotNetFunction as callDotNetFunction, dotNetNumbersFormat as dotNetNumbersFormat,
+                                  callDotNet_batch as callDotNet_batch,
+                                  callDotNetFunction_batch as callDotNetFunction_batch,
+                                  acallDotNet as acallDotNet,
+                                  callDotNet_stream as callDotNet_stream,
+                                  stop_dotnet_build_servers as stop_dotnet_build_servers,
+                                  build_dotnet as build_dotnet,
+                                  DotNetProgram as DotNetProgram)
 from .python.pythonhelpers import(callpython as callpython, 
                            callpythoncode as callpythoncode, 
                            callpythonmaincode as callpythonmaincode, 
                            callpython_subprocess as callpython_subprocess, 
                            load_python_code as load_python_code, 
-                           loadmycode as loadmycode)
\ No newline at end of file
+                           loadmycode as loadmycode,
+                           start_python_workers as start_python_workers,
+                           stop_python_workers as stop_python_workers,
+                           callpython_batch as callpython_batch,
+                           acallpython as acallpython,
+                           acallpythoncode as acallpythoncode,
+                           callpython_future as callpython_future,
+                           callpython_stream as callpython_stream)
\ No newline at end of file
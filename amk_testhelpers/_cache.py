@@ -0,0 +1,170 @@
+  # -*- coding: utf-8 -*-
+"""
+Module for the local cache directory of the test helpers.
+
+Build results are kept in the cache so they can be reused across calls, test runs and
+testall invocations. The location can be changed with the environment variable AMK_CACHE_DIR.
+
+Functions
+---------
+    - _cache_directory(): Return a subdirectory of the cache, creating it if needed.
+    - _store(): Atomically copy a file into the cache.
+    - _place(): Make a cached file available at another path.
+    - _build_directory(): Create a unique directory for one build.
+    - _finish_build(): Remove a build directory or schedule its removal.
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import atexit
+
+
+def _cache_directory(*parts:str) -> str:
+    """Return a subdirectory of the cache, creating it if needed.
+
+    Parameters
+    ----------
+    *parts : str
+        Path components of the subdirectory, for example 'c'.
+
+    Returns
+    -------
+    str
+        Absolute path of the directory.
+
+    Notes
+    -----
+    The cache is in AMK_CACHE_DIR if it is set, otherwise in %LOCALAPPDATA%\\amk_testhelpers
+    on Windows and in $XDG_CACHE_HOME/amk_testhelpers (~/.cache/amk_testhelpers) elsewhere.
+    """
+    root:str = os.environ.get('AMK_CACHE_DIR', '')
+    if not root:
+        if sys.platform == 'win32':
+            base:str = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+        else:
+            base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+        root = os.path.join(base, 'amk_testhelpers')
+
+    directory:str = os.path.join(os.path.abspath(root), *parts)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def _store(source:str, destination:str) -> None:
+    """Atomically copy a file into the cache.
+
+    The file is copied next to the destination and renamed into place, so concurrent
+    readers never see a partially written file.
+
+    Parameters
+    ----------
+    source : str
+        File to copy.
+    destination : str
+        Path of the file in the cache.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(destination), prefix='.tmp_')
+    os.close(fd)
+    try:
+        shutil.copy2(source, tmp)
+        os.replace(tmp, destination)
+    except:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def _place(cached:str, destination:str) -> None:
+    """Make a cached file available at another path.
+
+    The file is hard linked when possible and copied otherwise. Nothing is done if the
+    destination already is the cached file.
+
+    Parameters
+    ----------
+    cached : str
+        Path of the file in the cache.
+    destination : str
+        Path where the file is needed.
+    """
+    try:
+        if os.path.samefile(cached, destination):
+            return
+    except OSError:
+        pass
+
+    tmp:str = os.path.join(os.path.dirname(destination), f'.tmp_{os.getpid()}_{threading.get_ident()}_' + os.path.basename(destination))
+    try:
+        os.link(cached, tmp)
+    except OSError:
+        shutil.copy2(cached, tmp)
+    os.replace(tmp, destination)
+
+
+#Build directories which are still in use by the built programs, removed at exit
+_pending_builds:list[str] = []
+_pending_builds_lock = threading.Lock()
+
+
+def _build_directory(prefix:str='amk_build_') -> str:
+    """Create a unique directory for one build.
+
+    Every build gets its own directory, so concurrent builds of the same project never
+    write over each other's output.
+
+    Parameters
+    ----------
+    prefix : str, optional
+        Prefix of the directory name, by default 'amk_build_'
+
+    Returns
+    -------
+    str
+        Absolute path of the new directory.
+
+    Notes
+    -----
+    The directories are created in AMK_BUILD_DIR if it is set, for example a tmpfs such as /dev/shm,
+    otherwise in the system temporary directory.
+    """
+    root:str = os.environ.get('AMK_BUILD_DIR', '') or tempfile.gettempdir()
+    os.makedirs(root, exist_ok=True)
+    return tempfile.mkdtemp(prefix=prefix, dir=root)
+
+
+def _finish_build(directory:str, in_use:bool=False) -> None:
+    """Remove a build directory or schedule its removal.
+
+    Parameters
+    ----------
+    directory : str
+        Directory returned by _build_directory().
+    in_use : bool, optional
+        True if a program in the directory is still used, it is then removed when the process exits, by default False
+
+    Notes
+    -----
+    Set AMK_KEEP_BUILDS=1 to keep all build directories, for example to inspect a failed build.
+    """
+    if os.environ.get('AMK_KEEP_BUILDS', '0') not in ('', '0'):
+        return
+    if not in_use:
+        shutil.rmtree(directory, ignore_errors=True)
+        return
+    with _pending_builds_lock:
+        if not _pending_builds:
+            atexit.register(_remove_pending_builds)
+        _pending_builds.append(directory)
+
+
+def _remove_pending_builds() -> None:
+    """Remove the build directories which were in use until exit."""
+    with _pending_builds_lock:
+        for directory in _pending_builds:
+            shutil.rmtree(directory, ignore_errors=True)
+        _pending_builds.clear()
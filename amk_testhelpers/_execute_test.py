@@ -11,9 +11,23 @@ import os
 import unittest
 import subprocess
 import sys
+import argparse
+import concurrent.futures
+import concurrent.futures.process
+import tempfile
+import traceback
+import locale
+import hashlib
+import importlib.metadata
+import json
+import time
+import cProfile
 
+from amk_testhelpers._cache import _cache_directory
+from amk_testhelpers._report import _ReportResult, _task_report, _empty_report, _write_task_report, _read_task_report, _write_summary
 
-def runtest() -> None:
+
+def runtest(argv:list[str]|None=None) -> None:
     """
     Run the unit tests defined in a module.
 
@@ -23,18 +37,60 @@ def runtest() -> None:
     runs the test suite using a TextTestRunner with verbosity set to 2, 
     and writes the test results to a file named 'result.txt'.
 
+    The status, duration and failure message of every test are also written
+    to 'result.json' and, in JUnit XML format, to 'result.xml'.
+
+    Parameters
+    ----------
+    argv : list[str] | None, optional
+        Command-line arguments, by default sys.argv[1:]
+
+        --durations N
+            Print the N slowest tests after the results.
+        --profile
+            Run the tests under cProfile and write the statistics to 'result.prof'
+            next to 'result.txt', they can be viewed with pstats or snakeviz.
+            Only the test process is profiled, code run in child processes
+            (for example callpython() and callC()) shows up as waiting time.
+
+    """
+    parser = argparse.ArgumentParser(prog='test_assignment', description='Run the tests of the task in the current directory.')
+    parser.add_argument('--durations', type=int, default=0, metavar='N', help='print the N slowest tests')
+    parser.add_argument('--profile', action='store_true', help="profile the tests with cProfile and write 'tests/result.prof'")
+    args = parser.parse_args(argv)
+    if args.durations < 0:
+        parser.error('--durations must not be negative')
+
+    _runtestdir(os.getcwd(), durations=args.durations, profile=args.profile)
+
+
+def _runtestdir(current_dir:str, durations:int=0, profile:bool=False) -> unittest.TestResult|None:
+    """Run the tests of a task and write 'tests/result.txt' and the reports, see runtest().
+
+    Parameters
+    ----------
+    current_dir : str
+        Absolute path of the task directory.
+    durations : int, optional
+        Number of slowest tests to print, by default 0
+    profile : bool, optional
+        True to profile the tests and write 'tests/result.prof', by default False
+
+    Returns
+    -------
+    unittest.TestResult | None
+        Result of the tests, None if 'tests/tests.py' was not found.
     """
-    
-    current_dir:str = os.getcwd()
     #Get the path to the test directory
     testpath:str = os.path.join(current_dir, 'tests')
 
-    #Remove the result file
+    #Remove the result file, the reports and the profile
     resultfile:str = os.path.join(testpath, 'result.txt')
-    try:
-        os.remove(resultfile)
-    except:
-        pass
+    for filename in (resultfile, os.path.join(testpath, 'result.json'), os.path.join(testpath, 'result.xml'), os.path.join(testpath, 'result.prof')):
+        try:
+            os.remove(filename)
+        except:
+            pass
 
     #Get the test file
     test_file:str = os.path.join(testpath, 'tests.py')
@@ -46,11 +102,18 @@ def runtest() -> None:
         suite.addTest(loader.discover(start_dir=testpath, pattern='tests.py'))
     else:
         print('TESTS.PY FILE NOT FOUND! CHECK PATH!')
-        return
+        return None
     
     print('Test', os.path.basename(current_dir))
 
-    result = unittest.TextTestRunner(verbosity=2).run(suite)
+    runner = unittest.TextTestRunner(verbosity=2, resultclass=_ReportResult)
+    start:float = time.perf_counter()
+    if profile:
+        profiler = cProfile.Profile()
+        result = profiler.runcall(runner.run, suite)
+    else:
+        result = runner.run(suite)
+    duration:float = time.perf_counter() - start
 
     failures:int = len(result.failures)
     errors:int = len(result.errors)
@@ -60,45 +123,338 @@ def runtest() -> None:
     outputfile=open(resultfile, 'wt')
     outputfile.write('{0}\t{1}'.format(running_tests-(failures+errors), running_tests))
     outputfile.close()  
+    _write_task_report(testpath, _task_report(os.path.basename(current_dir), result, duration))
     if result.errors or result.failures:
         failed_tests:int = errors + failures
         print(f"{failed_tests}/{running_tests} tests failed!!")
     else:
         print(f"{running_tests} tests completed successfully!")
 
+    if durations:
+        print(f'\nSlowest {durations} tests:')
+        for case in sorted(result.testcases, key=lambda case: case['duration'], reverse=True)[:durations]:
+            print(f"{case['duration']:8.3f}s  {case['classname']}.{case['name']}")
+    if profile:
+        profilefile:str = os.path.join(testpath, 'result.prof')
+        profiler.dump_stats(profilefile)
+        print(f'\nProfile written to {profilefile}')
+
+    return result
+
 
-def runalltests() -> None:
+def runalltests(argv:list[str]|None=None) -> None:
     """ This function runs all tests in the current directory and writes the results to a file named 'results.txt'.
-    
+
+    The reports of the tasks are combined into 'results.json' and, in JUnit XML format, 'results.xml'.
+
+    The tasks are tested concurrently in a pool of worker processes, which run the tests directly instead of
+    starting 'test_assignment' for every task. The output of each task is printed as one block when the task
+    has finished, and 'results.txt' lists the tasks in alphabetical order. If a task crashes its worker,
+    the affected tasks are tested again, each in a new process.
+
+    Parameters
+    ----------
+    argv : list[str] | None, optional
+        Command-line arguments, by default sys.argv[1:]
+
+        -j N, --jobs N
+            Number of tasks tested at the same time, by default the number of CPUs.
+        --force
+            Test every task. By default a task whose files have not changed since it was last tested
+            reuses the previous result.
     """
+    parser = argparse.ArgumentParser(prog='testall', description='Run the tests of every task in the current directory.')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1, help='number of tasks tested at the same time (default: number of CPUs)')
+    parser.add_argument('--force', action='store_true', help='test every task, also the ones which have not changed since they were last tested')
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
 
-    import time
     path:str = os.getcwd()
     if os.path.exists(path + '/results.txt'):
         print('Removing old results file...')
         os.remove(path + '/results.txt')
-        time.sleep(1)
 
-    resultfile = open(path + '/results.txt', 'wt')
     skiplist:list[str] = ['ex_template', 'helpers']
+    directories:list[str] = sorted(directory for directory in os.listdir(path)
+                                   if directory not in skiplist and os.path.isdir(os.path.join(path, directory)))
 
-    for directory in os.listdir(path):
-        if directory in skiplist:
-            continue
-        if os.path.isdir(directory):
-            os.chdir(directory)
-            command:list[str] = ['test_assignment']
+    results:dict[str, str] = {}
+    reports:dict[str, dict] = {}
+    crashed:list[str] = []
+
+    #Tasks which have not changed since they were last tested reuse the previous result
+    shared_key:str = _shared_key(path, skiplist)
+    keys:dict[str, str] = {directory: _task_key(os.path.join(path, directory), shared_key) for directory in directories}
+    if not args.force:
+        for directory in directories:
+            cached = _cached_result(keys[directory])
+            if cached is not None:
+                print(f'----- {directory} -----')
+                print(f'{directory} has not changed since it was last tested, reusing the result')
+                results[directory] = cached['result']
+                reports[directory] = cached['report'] or _empty_report(directory)
+                _restoreresult(os.path.join(path, directory), cached['result'], cached['report'])
+        directories_to_test:list[str] = [directory for directory in directories if directory not in results]
+    else:
+        directories_to_test = list(directories)
+    sys.stdout.flush()
+
+    def report(directory:str, task:dict) -> None:
+        print(f'----- {directory} -----')
+        print(task['output'], end='' if task['output'].endswith('\n') else '\n')
+        result = task['result']
+        if result is None:
+            print(f'{directory} test result file not found!')
+            result = '0\t0'
+        else:
+            _store_result(keys[directory], result, task['report'])
+        results[directory] = result
+        reports[directory] = task['report'] or _empty_report(directory)
+        sys.stdout.flush()
+
+    #Worker processes run many tasks, so the interpreter and the imports are paid once per worker
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(args.jobs, max(len(directories_to_test), 1))) as executor:
+        futures = {executor.submit(_runtask, os.path.join(path, directory)): directory for directory in directories_to_test}
+        for directory in directories_to_test:
             print(f'Starting tests for {directory}...')
-            sys.stdout.flush()
-            subprocess.run(command, cwd=os.getcwd())
+        sys.stdout.flush()
+        for future in concurrent.futures.as_completed(futures):
+            directory = futures[future]
             try:
-                test_result_file = open(os.getcwd() + '/tests/result.txt', 'rt')
-                result:str = test_result_file.read()
-                test_result_file.close()
-                resultfile.write(f"{directory}\t{result}\n")
-            except:
-                print(f'{directory} test result file not found!')
-                resultfile.write(f"{directory}\t0\t0\n")
-
-            os.chdir('..')
-    resultfile.close()
\ No newline at end of file
+                task = future.result()
+            except concurrent.futures.process.BrokenProcessPool:
+                #A task crashed its worker, which also fails the tasks that were running next to it
+                crashed.append(directory)
+                continue
+            report(directory, task)
+
+    #Run the tasks of the broken pool again, each in a process of its own
+    if crashed:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.jobs) as executor:
+            futures = {executor.submit(_runtask_isolated, os.path.join(path, directory)): directory for directory in sorted(crashed)}
+            for future in concurrent.futures.as_completed(futures):
+                report(futures[future], future.result())
+
+    with open(path + '/results.txt', 'wt') as resultfile:
+        for directory in directories:
+            resultfile.write(f"{directory}\t{results[directory]}\n")
+    _write_summary(path, [reports[directory] for directory in directories])
+
+
+def _runtask(task_path:str) -> dict:
+    """Run the tests of one task in the current (worker) process.
+
+    Parameters
+    ----------
+    task_path : str
+        Absolute path of the task directory.
+
+    Returns
+    -------
+    dict
+        'output': the output of the tests, 'result': the contents of 'tests/result.txt' and 'report': the JSON report,
+        None if they were not written.
+
+    Notes
+    -----
+    The output is captured at the file descriptor level, so the output of compilers and other child processes
+    is included. The modules imported from the task directory are removed afterwards, so the next task in the
+    same worker loads its own 'tests' module.
+
+    The helpers find the task through the working directory, so the process changes into the task directory
+    for the duration of the task. This is only safe in a process which runs one task at a time, such as a
+    worker of the ProcessPoolExecutor in runalltests().
+    """
+    saved_cwd:str = os.getcwd()
+    saved_path:list[str] = list(sys.path)
+    saved_argv:list[str] = list(sys.argv)
+
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_fds:list[int] = [os.dup(1), os.dup(2)]
+    with tempfile.TemporaryFile() as capture:
+        os.dup2(capture.fileno(), 1)
+        os.dup2(capture.fileno(), 2)
+        try:
+            os.chdir(task_path)
+            sys.argv = ['test_assignment']
+            _runtestdir(task_path)
+        except BaseException:
+            traceback.print_exc()
+        finally:
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os.dup2(saved_fds[0], 1)
+            os.dup2(saved_fds[1], 2)
+            for fd in saved_fds:
+                os.close(fd)
+            os.chdir(saved_cwd)
+            sys.path[:] = saved_path
+            sys.argv = saved_argv
+            _unload_modules(task_path)
+
+        capture.seek(0)
+        output:str = capture.read().decode(locale.getpreferredencoding(False), errors='replace')
+
+    return {'output': output, 'result': _readresult(task_path), 'report': _read_task_report(task_path)}
+
+
+def _runtask_isolated(task_path:str) -> dict:
+    """Run the tests of one task in a new interpreter process, see _runtask()."""
+    command:list[str] = [sys.executable, '-c', 'from amk_testhelpers._execute_test import runtest; runtest()']
+    #A child which dies before runtest() removes them must not leave the results of an earlier run behind
+    for name in ('result.txt', 'result.json', 'result.xml'):
+        try:
+            os.remove(os.path.join(task_path, 'tests', name))
+        except OSError:
+            pass
+    try:
+        process = subprocess.run(command, cwd=task_path, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, errors='replace')
+    except OSError as e:
+        return {'output': f'{e}\n', 'result': None, 'report': None}
+    output:str = process.stdout
+    if process.returncode < 0:
+        output += f'\nTest process crashed (signal {-process.returncode})\n'
+    elif process.returncode != 0:
+        output += f'\nTest process exited with code {process.returncode}\n'
+    return {'output': output, 'result': _readresult(task_path), 'report': _read_task_report(task_path)}
+
+
+def _readresult(task_path:str) -> str|None:
+    """Return the contents of 'tests/result.txt' of the task, None if it does not exist."""
+    try:
+        with open(os.path.join(task_path, 'tests', 'result.txt'), 'rt') as test_result_file:
+            return test_result_file.read()
+    except OSError:
+        return None
+
+
+def _unload_modules(task_path:str) -> None:
+    """Remove the modules loaded from the task directory from sys.modules."""
+    prefix:str = os.path.join(os.path.abspath(task_path), '')
+    for name, module in list(sys.modules.items()):
+        file = getattr(module, '__file__', None)
+        if file and os.path.abspath(file).startswith(prefix):
+            del sys.modules[name]
+
+
+#Directories and file extensions created by building and testing a task, they are not part of its key
+_KEY_SKIP_DIRECTORIES:set[str] = {'__pycache__', 'bin', 'obj', '.vs', '.git'}
+_KEY_SKIP_EXTENSIONS:tuple[str, ...] = ('.pyc', '.exe', '.o', '.obj', '.tmp')
+_KEY_SKIP_FILES:set[str] = {os.path.join('tests', name) for name in ('result.txt', 'result.json', 'result.xml', 'result.prof')}
+
+
+def _tree_files(root:str, directory:str) -> list[str]:
+    """Return the files under a directory relative to root, without the build output directories."""
+    files:list[str] = []
+    for current, dirnames, filenames in os.walk(os.path.join(root, directory)):
+        dirnames[:] = [name for name in dirnames if name not in _KEY_SKIP_DIRECTORIES]
+        files.extend(os.path.relpath(os.path.join(current, name), root) for name in filenames)
+    return files
+
+
+def _hash_files(digest, root:str, files:list[str]) -> None:
+    """Add the names and contents of files relative to root to a hash, skipping build outputs and results."""
+    for name in sorted(files):
+        if name in _KEY_SKIP_FILES or name.endswith(_KEY_SKIP_EXTENSIONS):
+            continue
+        digest.update(name.replace(os.sep, '/').encode() + b'\0')
+        try:
+            with open(os.path.join(root, name), 'rb') as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+        except OSError:
+            digest.update(b'\0')
+
+
+def _shared_key(path:str, directories:list[str]) -> str:
+    """Return a key which changes when this package or the files shared by the tasks change.
+
+    Parameters
+    ----------
+    path : str
+        Absolute path of the assignment directory.
+    directories : list[str]
+        Directories of the assignment which are not tasks, for example 'helpers'.
+
+    Returns
+    -------
+    str
+        SHA-256 of the version of the package, the files of the package, such as its sources and
+        'allowed_libraries.txt', and the files in the shared directories of the assignment.
+    """
+    digest = hashlib.sha256()
+    try:
+        version:str = importlib.metadata.version('amk_testhelpers')
+    except importlib.metadata.PackageNotFoundError:
+        version = ''
+    digest.update(version.encode() + b'\0')
+
+    package:str = os.path.dirname(os.path.abspath(__file__))
+    _hash_files(digest, package, _tree_files(package, ''))
+    for directory in sorted(directories):
+        digest.update(directory.encode() + b'\0')
+        _hash_files(digest, path, _tree_files(path, directory))
+    return digest.hexdigest()
+
+
+def _task_key(task_path:str, shared_key:str) -> str:
+    """Return a key which changes when the files of a task or the shared files change.
+
+    Parameters
+    ----------
+    task_path : str
+        Absolute path of the task directory.
+    shared_key : str
+        Key of the package and the shared files of the assignment, see _shared_key().
+
+    Returns
+    -------
+    str
+        SHA-256 of the shared key, the name of the task and the names and contents of the files in the 'src'
+        and 'tests' directories and directly in the task directory, for example the project file of a .NET task.
+
+    Notes
+    -----
+    Build outputs (bin, obj, __pycache__, object files and executables) and the results in 'tests' are skipped.
+    """
+    digest = hashlib.sha256()
+    digest.update(shared_key.encode() + b'\0')
+    #The stored report names the task, so tasks with the same files do not share a key
+    digest.update(os.path.basename(os.path.normpath(task_path)).encode() + b'\0')
+
+    files:list[str] = [name for name in os.listdir(task_path) if os.path.isfile(os.path.join(task_path, name))]
+    for directory in ('src', 'tests'):
+        files.extend(_tree_files(task_path, directory))
+    _hash_files(digest, task_path, files)
+    return digest.hexdigest()
+
+
+def _cached_result(key:str) -> dict|None:
+    """Return the result line and the report stored for a task key, None if there are none."""
+    try:
+        with open(os.path.join(_cache_directory('results'), key), 'rt', encoding='utf-8') as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or not isinstance(cached.get('result'), str):
+        return None
+    return cached
+
+
+def _store_result(key:str, result:str, report:dict|None) -> None:
+    """Store the result line and the report of a task under its key."""
+    directory:str = _cache_directory('results')
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix='.tmp_')
+    with os.fdopen(fd, 'wt', encoding='utf-8') as f:
+        json.dump({'result': result, 'report': report}, f)
+    os.replace(tmp, os.path.join(directory, key))
+
+
+def _restoreresult(task_path:str, result:str, report:dict|None) -> None:
+    """Write 'tests/result.txt' and the reports of a task if they do not contain the result."""
+    if _readresult(task_path) != result:
+        with open(os.path.join(task_path, 'tests', 'result.txt'), 'wt') as f:
+            f.write(result)
+    if report is not None and _read_task_report(task_path) != report:
+        _write_task_report(os.path.join(task_path, 'tests'), report)
@@ -0,0 +1,455 @@
+  # -*- coding: utf-8 -*-
+"""
+Module for running the programs under test as child processes.
+
+This module contains the process handling shared by the Python, C/C++ and .NET helpers.
+
+Classes
+-------
+    - ProcessOutput: Standard output of a program, a str with the exit status and resource usage of the run.
+
+Functions
+---------
+    - _decode(): Decode child output the same way as subprocess.run(text=True) does.
+    - _output(): Convert raw child output into a ProcessOutput.
+    - _run(): Run a command and capture its standard output with an optional size limit.
+    - _arun(): Run a command with asyncio and return its standard output.
+    - _stream(): Run a command and yield its output line by line.
+    - run_in_background(): Run a helper function in the shared background executor.
+    - set_max_background_workers(): Set the number of background runs executed at the same time.
+"""
+
+import asyncio
+import locale
+import subprocess
+import os
+import sys
+import signal
+import threading
+import concurrent.futures
+import queue
+import time
+from collections.abc import Iterator
+
+
+#Shared executor for background runs, created on first use
+_executor = None
+_executor_lock = threading.Lock()
+_max_background_workers:int = min(32, (os.cpu_count() or 1) + 4)
+
+
+class ProcessOutput(str):
+    """Standard output of a program run by the helpers.
+
+    ProcessOutput is a normal string, so it can be compared and printed like the output
+    returned before. It carries additional information about the run as attributes.
+
+    Attributes
+    ----------
+    truncated : bool
+        True if the program reached the output limit and was killed. The string then contains
+        only the output read before the limit.
+    returncode : int | None
+        Exit status of the program, negative if it was killed by a signal.
+    wall_time : float
+        Wall-clock time of the run in seconds.
+    user_time : float | None
+        CPU time spent in user mode in seconds, None if not available on this platform.
+    system_time : float | None
+        CPU time spent in kernel mode in seconds, None if not available on this platform.
+    max_rss : int | None
+        Peak resident set size of the program in bytes, None if not available on this platform.
+        On Linux the value reported by the kernel is never lower than the memory of the
+        process which started the program, so it is useful for comparing runs, not as an exact size.
+
+    Examples
+    --------
+    >>> output = callpython(['10'])
+    >>> print(output.wall_time, output.user_time, output.max_rss)
+    """
+
+    truncated:bool = False
+    returncode:int|None = None
+    wall_time:float = 0.0
+    user_time:float|None = None
+    system_time:float|None = None
+    max_rss:int|None = None
+
+    def __new__(cls, text:str='', truncated:bool=False) -> 'ProcessOutput':
+        output = super().__new__(cls, text)
+        output.truncated = truncated
+        return output
+
+    def resources(self) -> dict:
+        """Return the resource usage of the run as a dictionary, for example for logging as JSON."""
+        return {
+            'returncode': self.returncode,
+            'wall_time': self.wall_time,
+            'user_time': self.user_time,
+            'system_time': self.system_time,
+            'max_rss': self.max_rss,
+            'truncated': self.truncated,
+        }
+
+
+def _decode(data: bytes, errors:str='strict') -> str:
+    """Decode child output the same way as subprocess.run(text=True) does.
+
+    Parameters
+    ----------
+    data : bytes
+        Raw bytes read from the child.
+    errors : str, optional
+        Error handling of the decoding, by default 'strict'
+
+    Returns
+    -------
+    str
+        Decoded text with universal newlines.
+    """
+    text:str = data.decode(locale.getpreferredencoding(False), errors)
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _output(data: bytes, max_output:int=0, returncode:int|None=None, wall_time:float=0.0, rusage=None) -> ProcessOutput:
+    """Convert raw child output into a ProcessOutput.
+
+    Parameters
+    ----------
+    data : bytes
+        Raw bytes read from the child. More than max_output bytes means that the limit was reached.
+    max_output : int, optional
+        Output limit in bytes, 0 means no limit, by default 0
+    returncode : int | None, optional
+        Exit status of the child, by default None
+    wall_time : float, optional
+        Wall-clock time of the run in seconds, by default 0.0
+    rusage : resource.struct_rusage | dict | None, optional
+        Resource usage of the child returned by os.wait4() or reported by the fork server, by default None
+
+    Returns
+    -------
+    ProcessOutput
+        Decoded output, truncated to max_output bytes if the limit was reached.
+    """
+    if max_output and len(data) > max_output:
+        print(f'Output limit of {max_output} bytes reached, the program was stopped!')
+        #The limit may split a multibyte character
+        output = ProcessOutput(_decode(data[:max_output], errors='ignore'), truncated=True)
+    else:
+        output = ProcessOutput(_decode(data))
+
+    output.returncode = returncode
+    output.wall_time = wall_time
+    if rusage is not None:
+        if not isinstance(rusage, dict):
+            rusage = _rusage_dict(rusage)
+        output.user_time = rusage['user_time']
+        output.system_time = rusage['system_time']
+        output.max_rss = rusage['max_rss']
+    return output
+
+
+def _rusage_dict(rusage) -> dict:
+    """Convert resource.struct_rusage into a dictionary, max_rss in bytes."""
+    #Linux reports the peak RSS in kilobytes, macOS in bytes
+    scale:int = 1 if sys.platform == 'darwin' else 1024
+    return {'user_time': rusage.ru_utime, 'system_time': rusage.ru_stime, 'max_rss': rusage.ru_maxrss * scale}
+
+
+def _run(cmd_line:list[str], cwd:str, input:str='', timeout:float=30, max_output:int=0) -> subprocess.CompletedProcess:
+    """Run a command and capture its standard output.
+
+    Parameters
+    ----------
+    cmd_line : list[str]
+        The program and its arguments.
+    cwd : str
+        Working directory of the program.
+    input : str, optional
+        Input to be passed to the program, by default ''
+    timeout : float, optional
+        Maximum time in seconds to wait for the program to execute, by default 30
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit, by default 0
+
+    Returns
+    -------
+    subprocess.CompletedProcess
+        Result of the run, stdout is a ProcessOutput.
+
+    Raises
+    ------
+    TimeoutExpired
+        If the execution exceeds the specified timeout.
+
+    Notes
+    -----
+    With a limit the output is read into a fixed-size buffer. When the program writes more than
+    max_output bytes it is killed and the output read so far is returned with 'truncated' set.
+
+    The exit status, wall-clock time, CPU times and peak RSS of the program are attached to the
+    returned ProcessOutput. CPU times and peak RSS come from os.wait4() and are None on Windows.
+    """
+    start:float = time.perf_counter()
+    process = subprocess.Popen(cmd_line, cwd=cwd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+    lock = threading.Lock()
+    rusage = None
+
+    output = bytearray(max_output + 1) if max_output else bytearray()
+    size:int = 0
+
+    def write_input() -> None:
+        try:
+            process.stdin.write(input.encode(locale.getpreferredencoding(False)))
+        except (BrokenPipeError, OSError):
+            pass
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+
+    def wait_child() -> None:
+        #os.wait4() returns the resource usage of the child, the waiter thread owns the reaping
+        nonlocal rusage
+        if hasattr(os, 'waitid'):
+            #Wait for the exit without reaping, the PID stays reserved so kill() cannot signal a reused PID
+            os.waitid(os.P_PID, process.pid, os.WEXITED | os.WNOWAIT)
+            with lock:
+                _, status, rusage = os.wait4(process.pid, 0)
+                process.returncode = os.waitstatus_to_exitcode(status)
+        else:
+            #macOS before Python 3.13 has no os.waitid(), reap directly
+            _, status, rusage = os.wait4(process.pid, 0)
+            with lock:
+                process.returncode = os.waitstatus_to_exitcode(status)
+
+    def kill() -> None:
+        with lock:
+            if process.returncode is None:
+                #Popen.kill() would poll the child and could reap it before wait4()
+                if hasattr(os, 'wait4'):
+                    os.kill(process.pid, signal.SIGKILL)
+                else:
+                    process.kill()
+
+    def read_output() -> None:
+        nonlocal size
+        if max_output:
+            with memoryview(output) as view:
+                while size <= max_output:
+                    count = process.stdout.readinto(view[size:])
+                    if not count:
+                        break
+                    size += count
+            if size > max_output:
+                kill()
+        else:
+            while True:
+                chunk:bytes = process.stdout.read(65536)
+                if not chunk:
+                    break
+                output.extend(chunk)
+                size += len(chunk)
+
+    writer = threading.Thread(target=write_input, daemon=True)
+    reader = threading.Thread(target=read_output, daemon=True)
+    writer.start()
+    reader.start()
+    if hasattr(os, 'wait4'):
+        waiter = threading.Thread(target=wait_child, daemon=True)
+    else:
+        waiter = threading.Thread(target=process.wait, daemon=True)
+    waiter.start()
+
+    waiter.join(timeout)
+    if waiter.is_alive():
+        kill()
+        waiter.join()
+        reader.join()
+        process.stdout.close()
+        raise subprocess.TimeoutExpired(cmd_line, timeout, output=_decode(bytes(output[:size]), errors='ignore'))
+
+    wall_time:float = time.perf_counter() - start
+    reader.join()
+    process.stdout.close()
+
+    return subprocess.CompletedProcess(cmd_line, process.returncode, _output(bytes(output[:size]), max_output, process.returncode, wall_time, rusage))
+
+
+async def _arun(cmd_line:list[str], cwd:str, input:str='', timeout:float=30) -> str:
+    """Run a command with asyncio and return its standard output.
+
+    Parameters
+    ----------
+    cmd_line : list[str]
+        The program and its arguments.
+    cwd : str
+        Working directory of the program.
+    input : str, optional
+        Input to be passed to the program, by default ''
+    timeout : float, optional
+        Maximum time in seconds to wait for the program to execute, by default 30
+
+    Returns
+    -------
+    str
+        Standard output generated by the program.
+
+    Raises
+    ------
+    TimeoutExpired
+        If the execution exceeds the specified timeout.
+
+    Notes
+    -----
+    The program is killed if it times out or if the awaiting task is cancelled,
+    so no child process is left running in either case.
+    """
+    process = await asyncio.create_subprocess_exec(*cmd_line, cwd=cwd, stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE)
+    try:
+        stdout, _ = await asyncio.wait_for(process.communicate(input.encode(locale.getpreferredencoding(False))), timeout)
+    except asyncio.TimeoutError:
+        await _akill(process)
+        raise subprocess.TimeoutExpired(cmd_line, timeout)
+    except BaseException:
+        await _akill(process)
+        raise
+
+    return _decode(stdout)
+
+
+async def _akill(process: asyncio.subprocess.Process) -> None:
+    """Kill the process if it is still running and wait for it to exit."""
+    if process.returncode is None:
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+    await asyncio.shield(process.wait())
+
+
+def _stream(cmd_line:list[str], cwd:str, input:str='', timeout:float=30, env:dict[str, str]|None=None) -> Iterator[str]:
+    """Run a command and yield its standard output line by line as it arrives.
+
+    Parameters
+    ----------
+    cmd_line : list[str]
+        The program and its arguments.
+    cwd : str
+        Working directory of the program.
+    input : str, optional
+        Input to be passed to the program, by default ''
+    timeout : float, optional
+        Maximum time in seconds for the whole run, by default 30
+    env : dict[str, str] | None, optional
+        Environment of the program, by default the environment of this process
+
+    Yields
+    ------
+    str
+        Lines of the standard output, including the line terminator.
+
+    Notes
+    -----
+    The program is killed when the caller stops iterating (break, close() or the generator is garbage
+    collected) or when the timeout expires. On timeout 'Timeout expired!' is printed and the iteration ends.
+    """
+    process = subprocess.Popen(cmd_line, cwd=cwd, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+    lines:queue.Queue = queue.Queue()
+
+    def write_input() -> None:
+        try:
+            process.stdin.write(input)
+            process.stdin.close()
+        except (BrokenPipeError, OSError, ValueError):
+            pass
+
+    def read_output() -> None:
+        try:
+            for line in process.stdout:
+                lines.put(line)
+        except (OSError, ValueError):
+            pass
+        lines.put(None)
+
+    threading.Thread(target=write_input, daemon=True).start()
+    threading.Thread(target=read_output, daemon=True).start()
+
+    deadline:float = time.monotonic() + timeout
+    try:
+        while True:
+            try:
+                line = lines.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                print('Timeout expired!')
+                return
+            if line is None:
+                return
+            yield line
+    finally:
+        if process.poll() is None:
+            process.kill()
+        process.wait()
+        process.stdout.close()
+
+
+def set_max_background_workers(max_workers:int) -> None:
+    """Set the number of background runs executed at the same time.
+
+    The limit is shared by all background runs of the process. Runs which are submitted
+    when the limit is reached wait until an earlier run has finished.
+
+    Parameters
+    ----------
+    max_workers : int
+        Maximum number of concurrent background runs.
+
+    Raises
+    ------
+    ValueError
+        If max_workers is less than 1.
+
+    Notes
+    -----
+    Runs which were already submitted keep running in the previous executor.
+    """
+    global _executor, _max_background_workers
+
+    if max_workers < 1:
+        raise ValueError('max_workers must be greater than 0')
+
+    with _executor_lock:
+        _max_background_workers = max_workers
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def run_in_background(function, *args, **kwargs) -> concurrent.futures.Future:
+    """Run a helper function in the shared background executor.
+
+    Parameters
+    ----------
+    function : Callable
+        The function to run, for example callpython or callC.
+    *args, **kwargs
+        Arguments passed to the function.
+
+    Returns
+    -------
+    concurrent.futures.Future
+        Future holding the return value of the function, or the exception it raised.
+
+    Examples
+    --------
+    >>> server = run_in_background(callC, ['8080'], timeout=10)
+    >>> client_output = callpython(['localhost', '8080'])
+    >>> server_output = server.result()
+    """
+    global _executor
+
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(max_workers=_max_background_workers, thread_name_prefix='amk_background')
+        return _executor.submit(function, *args, **kwargs)
@@ -0,0 +1,220 @@
+  # -*- coding: utf-8 -*-
+"""
+Module for the machine-readable test reports.
+
+runtest() writes 'tests/result.json' and 'tests/result.xml' (JUnit XML) next to 'tests/result.txt',
+and runalltests() combines the reports of all tasks into 'results.json' and 'results.xml'.
+
+Classes
+-------
+    - _ReportResult: Text test result which also records every test.
+
+Functions
+---------
+    - _task_report(): Build the report of a task from its test result.
+    - _empty_report(): Report of a task without test results.
+    - _write_task_report(): Write the JSON and JUnit XML reports of a task.
+    - _read_task_report(): Read the JSON report of a task.
+    - _write_summary(): Write the JSON and JUnit XML reports of all tasks.
+"""
+
+import os
+import re
+import json
+import time
+import unittest
+import xml.etree.ElementTree as ET
+
+
+#Characters which are not allowed in XML 1.0 documents, for example NUL and the escape of terminal colours
+_XML_INVALID = re.compile('[^\x09\x0a\x0d\x20-\ud7ff\ue000-\ufffd\U00010000-\U0010ffff]')
+
+
+def _xml_text(text:str) -> str:
+    """Replace the characters which XML cannot contain with Python escapes such as '\\x1b'."""
+    return _XML_INVALID.sub(lambda match: repr(match.group())[1:-1], text)
+
+
+class _ReportResult(unittest.TextTestResult):
+    """Text test result which also records the status, duration and failure message of every test.
+
+    The printed output is the same as with unittest.TextTestResult.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.testcases:list[dict] = []
+        self._cases:dict[str, dict] = {}
+        self._started:dict[str, float] = {}
+
+    def _case(self, test:unittest.TestCase) -> dict:
+        """Return the record of a test, creating it if needed."""
+        test_id:str = test.id()
+        case = self._cases.get(test_id)
+        if case is None:
+            if isinstance(test, unittest.TestCase):
+                classname, _, name = test_id.rpartition('.')
+            else:
+                #Errors in class and module fixtures are reported as 'setUpClass (module.Class)'
+                name, _, classname = test_id.partition(' (')
+                classname = classname.rstrip(')')
+            case = {'name': name, 'classname': classname, 'status': 'passed', 'duration': 0.0, 'message': ''}
+            self._cases[test_id] = case
+            self.testcases.append(case)
+        return case
+
+    def _fail(self, test:unittest.TestCase, status:str, message:str) -> None:
+        case = self._case(test)
+        if case['status'] != 'error':
+            case['status'] = status
+        case['message'] += message
+
+    def startTest(self, test:unittest.TestCase) -> None:
+        self._case(test)
+        self._started[test.id()] = time.perf_counter()
+        super().startTest(test)
+
+    def stopTest(self, test:unittest.TestCase) -> None:
+        super().stopTest(test)
+        started = self._started.pop(test.id(), None)
+        if started is not None:
+            self._case(test)['duration'] = time.perf_counter() - started
+
+    def addError(self, test:unittest.TestCase, err) -> None:
+        super().addError(test, err)
+        self._fail(test, 'error', self.errors[-1][1])
+
+    def addFailure(self, test:unittest.TestCase, err) -> None:
+        super().addFailure(test, err)
+        self._fail(test, 'failure', self.failures[-1][1])
+
+    def addSubTest(self, test:unittest.TestCase, subtest:unittest.TestCase, err) -> None:
+        super().addSubTest(test, subtest, err)
+        if err is not None:
+            if issubclass(err[0], test.failureException):
+                self._fail(test, 'failure', f'{subtest}\n{self.failures[-1][1]}')
+            else:
+                self._fail(test, 'error', f'{subtest}\n{self.errors[-1][1]}')
+
+    def addSkip(self, test:unittest.TestCase, reason:str) -> None:
+        super().addSkip(test, reason)
+        case = self._case(test)
+        case['status'] = 'skipped'
+        case['message'] = reason
+
+    def addExpectedFailure(self, test:unittest.TestCase, err) -> None:
+        super().addExpectedFailure(test, err)
+        case = self._case(test)
+        case['status'] = 'expected failure'
+        case['message'] = self.expectedFailures[-1][1]
+
+    def addUnexpectedSuccess(self, test:unittest.TestCase) -> None:
+        super().addUnexpectedSuccess(test)
+        self._case(test)['status'] = 'unexpected success'
+
+
+def _task_report(name:str, result:_ReportResult, duration:float) -> dict:
+    """Build the report of a task from its test result.
+
+    Parameters
+    ----------
+    name : str
+        Name of the task.
+    result : _ReportResult
+        Result of the tests of the task.
+    duration : float
+        Time used to run the tests, in seconds.
+
+    Returns
+    -------
+    dict
+        Totals of the task and the records of its tests. 'passed' is counted as in 'result.txt'.
+    """
+    failures:int = len(result.failures)
+    errors:int = len(result.errors)
+    return {
+        'name': name,
+        'tests': result.testsRun,
+        'passed': result.testsRun - (failures + errors),
+        'failures': failures,
+        'errors': errors,
+        'skipped': len(result.skipped),
+        'duration': duration,
+        'testcases': result.testcases,
+    }
+
+
+def _empty_report(name:str) -> dict:
+    """Report of a task without test results, for example when 'tests.py' is missing."""
+    return {'name': name, 'tests': 0, 'passed': 0, 'failures': 0, 'errors': 0, 'skipped': 0, 'duration': 0.0, 'testcases': []}
+
+
+def _testsuite(report:dict) -> ET.Element:
+    """Convert the report of a task into a JUnit XML testsuite element."""
+    suite = ET.Element('testsuite', {
+        'name': _xml_text(report['name']),
+        'tests': str(report['tests']),
+        'failures': str(report['failures']),
+        'errors': str(report['errors']),
+        'skipped': str(report['skipped']),
+        'time': f"{report['duration']:.3f}",
+    })
+    for case in report['testcases']:
+        element = ET.SubElement(suite, 'testcase', {'classname': _xml_text(case['classname']), 'name': _xml_text(case['name']), 'time': f"{case['duration']:.3f}"})
+        status:str = case['status']
+        if status in ('failure', 'error', 'skipped'):
+            message:str = _xml_text(case['message'])
+            lines:list[str] = message.strip().splitlines()
+            child = ET.SubElement(element, status, {'message': lines[-1] if lines else ''})
+            if status != 'skipped':
+                child.text = message
+    return suite
+
+
+def _write_xml(element:ET.Element, filename:str) -> None:
+    """Write an XML element with indentation and an XML declaration into a file."""
+    ET.indent(element)
+    ET.ElementTree(element).write(filename, encoding='utf-8', xml_declaration=True)
+
+
+def _write_task_report(testpath:str, report:dict) -> None:
+    """Write 'result.json' and 'result.xml' of a task into its tests directory."""
+    with open(os.path.join(testpath, 'result.json'), 'wt', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    _write_xml(_testsuite(report), os.path.join(testpath, 'result.xml'))
+
+
+def _read_task_report(task_path:str) -> dict|None:
+    """Return the JSON report of a task, None if it does not exist."""
+    try:
+        with open(os.path.join(task_path, 'tests', 'result.json'), 'rt', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_summary(path:str, reports:list[dict]) -> None:
+    """Write 'results.json' and 'results.xml' with the reports of all tasks.
+
+    Parameters
+    ----------
+    path : str
+        Directory of the files.
+    reports : list[dict]
+        Reports of the tasks, in the order they are listed.
+    """
+    summary:dict = {name: sum(report[name] for report in reports) for name in ('tests', 'passed', 'failures', 'errors', 'skipped', 'duration')}
+    summary['tasks'] = reports
+    with open(os.path.join(path, 'results.json'), 'wt', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+
+    suites = ET.Element('testsuites', {
+        'tests': str(summary['tests']),
+        'failures': str(summary['failures']),
+        'errors': str(summary['errors']),
+        'skipped': str(summary['skipped']),
+        'time': f"{summary['duration']:.3f}",
+    })
+    for report in reports:
+        suites.append(_testsuite(report))
+    _write_xml(suites, os.path.join(path, 'results.xml'))
@@ -10,7 +10,19 @@ from amk_testhelpers.cpp.cpphelpers import (
     callC,
     callCPP,
     callCFunction,
-    callCPPFunction
+    callCPPFunction,
+    callC_batch,
+    callCPP_batch,
+    callCFunction_batch,
+    callCPPFunction_batch,
+    acallC,
+    callC_stream,
+    build_c,
+    build_cpp,
+    CProgram,
+    build_c_project,
+    build_cpp_project,
+    CHarness
 )
 
-__all__ = ['callC', 'callCPP', 'callCFunction', 'callCPPFunction']
\ No newline at end of file
+__all__ = ['callC', 'callCPP', 'callCFunction', 'callCPPFunction', 'callC_batch', 'callCPP_batch', 'callCFunction_batch', 'callCPPFunction_batch', 'acallC', 'callC_stream', 'build_c', 'build_cpp', 'CProgram', 'build_c_project', 'build_cpp_project', 'CHarness']
\ No newline at end of file
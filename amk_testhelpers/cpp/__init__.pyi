@@ -2,5 +2,17 @@ from .cpphelpers import (
     callC as callC,
     callCPP as callCPP,
     callCFunction as callCFunction,
-    callCPPFunction as callCPPFunction
+    callCPPFunction as callCPPFunction,
+    callC_batch as callC_batch,
+    callCPP_batch as callCPP_batch,
+    callCFunction_batch as callCFunction_batch,
+    callCPPFunction_batch as callCPPFunction_batch,
+    acallC as acallC,
+    callC_stream as callC_stream,
+    build_c as build_c,
+    build_cpp as build_cpp,
+    CProgram as CProgram,
+    build_c_project as build_c_project,
+    build_cpp_project as build_cpp_project,
+    CHarness as CHarness
 )
\ No newline at end of file
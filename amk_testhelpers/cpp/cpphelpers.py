@@ -5,19 +5,52 @@ Module for handling various utility functions and executing code for testing pur
 This module provides functions for running C/C++ code snippets for testing purposes.
 It includes functions for executing code, handling file paths, and interacting with subprocesses.
 
+Classes
+-------
+    - CProgram: Handle to a compiled program with run() and run_batch() methods.
+    - CHarness: Persistent test harness which runs many test cases in one process.
+
 Functions
 ---------
     - callCPP(): Executes C++ code.
     - callC(): Executes C code.
     - callCPPFunction(): Executes C++ code along with a specific function.
     - callCFunction(): Executes C code along with a specific function.
+    - build_c(), build_cpp(): Compile a program once and return a CProgram handle for running it many times.
+    - build_c_project(), build_cpp_project(): Compile a multi-file program incrementally and in parallel.
+    - callC_stream(): Executes C code and yields the output line by line.
+    - acallC(): asyncio counterpart of callC().
+    - callCPP_batch(), callC_batch(), callCPPFunction_batch(), callCFunction_batch(): Compile once and execute the program for many test cases.
 """
 
 import subprocess
 import os
+import locale
+import sys
+import re
+import hashlib
+import functools
+import tempfile
+import concurrent.futures
+import asyncio
+import shutil
+import threading
+import queue
+import time
+from collections.abc import Iterator
+
+from amk_testhelpers._cache import _build_directory, _cache_directory, _finish_build, _place, _store
+from amk_testhelpers._process import _arun, _output, _run, _stream
+
 
+#Bump when the layout of the cached programs changes
+_COMPILE_CACHE_VERSION = 3
+_INCLUDE_PATTERN = re.compile(rb'^[ \t]*#[ \t]*include[ \t]*"([^"]+)"', re.MULTILINE)
+#Directory of amk_harness.h, it is on the include path of every build
+HARNESS_INCLUDE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'include')
 
-def callCPP(cmdline_args:list[str] = [], input:str='', timeout:int=30, compiler:str='g++', enable_VS:bool=True) -> str:
+
+def callCPP(cmdline_args:list[str] = [], input:str='', timeout:int=30, compiler:str='g++', enable_VS:bool=True, max_output:int=0) -> str:
     """Execute a C++ program and return the output.
 
     This function compiles and executes a C++ program located in the `src` directory of the current project. 
@@ -35,21 +68,25 @@ def callCPP(cmdline_args:list[str] = [], input:str='', timeout:int=30, compiler:
         Compiler to use for compilation, by default 'g++'
     enable_VS : bool, optional
         Flag indicating whether to enable Visual Studio compiler, by default True
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit, by default 0
 
     Returns
     -------
     str
         Standard output generated by the executed program.
+        If the output limit is reached, the program is stopped and the returned output has 'truncated' set to True.
+        The exit status, wall-clock time, CPU times and peak RSS of the run are available as attributes, see ProcessOutput.
 
     Notes
     -------
     This function relies on the `callC` function to handle the compilation and execution process. It passes the appropriate parameters for compiling a C++ program.
-    - If Visual Studio compiler is enabled (`enable_VS=True`), the function attempts to compile the source code using `cl.exe`.
-    - If compilation fails or Visual Studio compiler is not enabled, the function falls back to the specified compiler (g++ by default) to compile the source code.
+    - If Visual Studio compiler is enabled (`enable_VS=True`), the source code is compiled with `cl.exe` when it is found in PATH.
+    - Otherwise the specified compiler (g++ by default) is used. The available compilers are probed once per process.
     """
-    return callC(cmdline_args, input, timeout, compiler, 'my_code.cpp', enable_VS)
+    return callC(cmdline_args, input, timeout, compiler, 'my_code.cpp', enable_VS, max_output)
 
-def callC(cmdline_args:list[str]=[], input:str='', timeout:int=30, compiler:str='gcc', source:str='my_code.c', enable_VS:bool=True):
+def callC(cmdline_args:list[str]=[], input:str='', timeout:int=30, compiler:str='gcc', source:str='my_code.c', enable_VS:bool=True, max_output:int=0):
     """Execute a C program and return the output.
 
     This function compiles and executes a C program located in the `src` directory of the current project. 
@@ -69,11 +106,15 @@ def callC(cmdline_args:list[str]=[], input:str='', timeout:int=30, compiler:str=
         Name of the C source file, by default 'my_code.c'
     enable_VS : bool, optional
         Flag indicating whether to enable Visual Studio compiler, by default True
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit, by default 0
 
     Returns
     -------
     str
         Standard output generated by the executed program.
+        If the output limit is reached, the program is stopped and the returned output has 'truncated' set to True.
+        The exit status, wall-clock time, CPU times and peak RSS of the run are available as attributes, see ProcessOutput.
 
     Raises
     ------
@@ -86,49 +127,14 @@ def callC(cmdline_args:list[str]=[], input:str='', timeout:int=30, compiler:str=
 
     Notes
     -------
-        - If Visual Studio compiler is enabled (`enable_VS=True`), the function attempts to compile the source code using `cl.exe`.
-        - If compilation fails or Visual Studio compiler is not enabled, the function falls back to the specified compiler (GCC by default) to compile the source code.
+        - If Visual Studio compiler is enabled (`enable_VS=True`), the source code is compiled with `cl.exe` when it is found in PATH.
+        - Otherwise the specified compiler (GCC by default) is used. The available compilers are probed once per process.
         - The compiled program is executed, and its standard output is returned.
 
     """
-    path=os.getcwd()
-
-    #Compile the source code
-    VS_compile_succeed=False
-    if enable_VS:
-        try:
-            rc = subprocess.run(['cl.exe', source], cwd=path+'/src', shell=True)
-            if rc.returncode!=0:
-                raise FileNotFoundError
-            VS_compile_succeed=True
-        except:
-            print('Visual Studio compile failed, trying GCC!')
-    
-    if not VS_compile_succeed:
-        try:
-            rc = subprocess.run([compiler,source,'-o','my_code.exe'], cwd=path+'/src', shell=True)
-            if rc.returncode!=0:
-                raise FileNotFoundError
-        except:
-            print('!!Compile dropped to fallback!!')
-            rc = subprocess.run([compiler+' '+source+' -o my_code.exe'], cwd=path+'/src', shell=True)
-            print("Fallback completed, don't worry")
-
-
-    try:
-        cmd_line=['./my_code.exe']+cmdline_args
-        rc = subprocess.run(cmd_line, cwd=path+'/src', stdout=subprocess.PIPE, text=True, input=input, timeout=timeout)
-        if rc.returncode!=0:
-            raise FileNotFoundError
-    except:
-        print('!!Running dropped to fallback!!')
-        cmd_line=[path+'\\src\\my_code.exe']+cmdline_args
-        rc = subprocess.run(cmd_line, cwd=path+'/src', stdout=subprocess.PIPE, text=True, input=input, timeout=timeout)
-        print("Fallback completed, don't worry")
-
-    return rc.stdout
+    return build_c(source, compiler, enable_VS=enable_VS).run(cmdline_args, input, timeout, max_output)
 
-def callCPPFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30, compiler:str='g++', source:str='my_code.cpp', testmain:str='../tests/testmain.cpp', enable_VS:bool=True) -> str:
+def callCPPFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30, compiler:str='g++', source:str='my_code.cpp', testmain:str='../tests/testmain.cpp', enable_VS:bool=True, max_output:int=0) -> str:
     """Execute a C++ program and return the output.
 
     This function compiles and executes a C++ program located in the `src` directory of the current project. 
@@ -150,22 +156,26 @@ def callCPPFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30, com
         Path to the test main file used for compilation, by default '../tests/testmain.cpp'
     enable_VS : bool, optional
         Flag indicating whether to enable Visual Studio compiler, by default True
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit, by default 0
 
     Returns
     -------
     str
         Standard output generated by the executed program.
+        If the output limit is reached, the program is stopped and the returned output has 'truncated' set to True.
+        The exit status, wall-clock time, CPU times and peak RSS of the run are available as attributes, see ProcessOutput.
 
     Notes
     -------
-        - If Visual Studio compiler is enabled (`enable_VS=True`), the function attempts to compile the source code using `cl.exe`.
-        - If compilation fails or Visual Studio compiler is not enabled, the function falls back to the specified compiler (g++ by default) to compile the source code.
+        - If Visual Studio compiler is enabled (`enable_VS=True`), the source code is compiled with `cl.exe` when it is found in PATH.
+        - Otherwise the specified compiler (g++ by default) is used. The available compilers are probed once per process.
         - The compiled program is executed, and its standard output is returned.
     """
-    return callCFunction(cmdline_args, input, timeout, compiler, source, testmain, enable_VS)
+    return callCFunction(cmdline_args, input, timeout, compiler, source, testmain, enable_VS, max_output)
 
 
-def callCFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30, compiler:str='gcc', source:str='my_code.c', testmain:str='../tests/testmain.c', enable_VS:bool=True) -> str:
+def callCFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30, compiler:str='gcc', source:str='my_code.c', testmain:str='../tests/testmain.c', enable_VS:bool=True, max_output:int=0) -> str:
     """ Execute a C program and return the output.
 
     This function compiles and executes a C program located in the `src` directory of the current project. 
@@ -187,11 +197,15 @@ def callCFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30, compi
         Path to the test main file used for compilation, by default '../tests/testmain.c'
     enable_VS : bool, optional
         Flag indicating whether to enable Visual Studio compiler, by default True
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit, by default 0
 
     Returns
     -------
     str
         Standard output generated by the executed program.
+        If the output limit is reached, the program is stopped and the returned output has 'truncated' set to True.
+        The exit status, wall-clock time, CPU times and peak RSS of the run are available as attributes, see ProcessOutput.
 
     Raises
     ------
@@ -204,43 +218,891 @@ def callCFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30, compi
 
     Notes
     -------
-        - If Visual Studio compiler is enabled (`enable_VS=True`), the function attempts to compile the source code using `cl.exe`.
-        - If compilation fails or Visual Studio compiler is not enabled, the function falls back to the specified compiler (gcc by default) to compile the source code.
+        - If Visual Studio compiler is enabled (`enable_VS=True`), the source code is compiled with `cl.exe` when it is found in PATH.
+        - Otherwise the specified compiler (gcc by default) is used. The available compilers are probed once per process.
         - The compiled program is executed, and its standard output is returned.
     """
-    path=os.getcwd()
+    return build_c(source, compiler, testmain, enable_VS).run(cmdline_args, input, timeout, max_output)
 
-    #Compile the source code
-    VS_compile_succeed=False
-    if enable_VS:
+
+class CProgram:
+    """Handle to a compiled C or C++ program.
+
+    The handle is returned by `build_c` and `build_cpp`. The program is compiled once and can then be
+    executed any number of times, for example build it in `setUpClass` and run it in every test method.
+
+    Parameters
+    ----------
+    executable : str
+        Absolute path of the compiled program.
+    cwd : str
+        Working directory of the program, the `src` directory of the project.
+
+    Examples
+    --------
+    >>> program = build_c()
+    >>> program.run(['1', '2'])
+    >>> program.run_batch([([], '5\\n'), ([], '6\\n')])
+    """
+
+    def __init__(self, executable:str, cwd:str) -> None:
+        self.executable:str = executable
+        self.cwd:str = cwd
+
+    def __repr__(self) -> str:
+        return f'CProgram({self.executable!r})'
+
+    def run(self, cmdline_args:list[str]=[], input:str='', timeout:int=30, max_output:int=0) -> str:
+        """Execute the program and return the output.
+
+        Parameters
+        ----------
+        cmdline_args : list[str], optional
+            Additional command-line arguments to pass to the program, by default []
+        input : str, optional
+            Input to be passed to the program, by default ''
+        timeout : int, optional
+            Maximum time in seconds to wait for the program to execute, by default 30
+        max_output : int, optional
+            Maximum number of bytes of output to capture, 0 means no limit, by default 0
+
+        Returns
+        -------
+        str
+            Standard output generated by the executed program.
+            If the output limit is reached, the program is stopped and the returned output has 'truncated' set to True.
+            The exit status, wall-clock time, CPU times and peak RSS of the run are available as attributes, see ProcessOutput.
+
+        Raises
+        ------
+        TimeoutExpired
+            If the execution exceeds the specified timeout.
+        """
+        return _run([self.executable]+cmdline_args, cwd=self.cwd, input=input, timeout=timeout, max_output=max_output).stdout
+
+    def run_batch(self, cases:list[tuple[list[str], str]], timeout:int=30, max_workers:int|None=None, max_output:int=0) -> list[str]:
+        """Execute the program concurrently for every test case.
+
+        Parameters
+        ----------
+        cases : list[tuple[list[str], str]]
+            Test cases as (cmdline_args, input) pairs.
+        timeout : int, optional
+            Maximum time in seconds for each run, by default 30
+        max_workers : int | None, optional
+            Maximum number of programs running at the same time, by default chosen by ThreadPoolExecutor.
+        max_output : int, optional
+            Maximum number of bytes of output to capture per run, 0 means no limit, by default 0
+
+        Returns
+        -------
+        list[str]
+            Standard output of each run, in the same order as the cases.
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures=[executor.submit(self.run, cmdline_args, input, timeout, max_output) for cmdline_args, input in cases]
+            return [future.result() for future in futures]
+
+    def harness(self) -> 'CHarness':
+        """Start the program as a persistent test harness.
+
+        The test main must define its main function with AMK_HARNESS_MAIN from amk_harness.h.
+
+        Returns
+        -------
+        CHarness
+            Harness running this program, use it as a context manager.
+        """
+        return CHarness(self)
+
+
+class CHarness:
+    """Persistent test harness which runs many test cases in one process.
+
+    The test main defines its main function with the AMK_HARNESS_MAIN macro from amk_harness.h, which is on
+    the include path of every build. The harness program stays running and executes the body of the test main
+    once per test case, with the arguments and input of the case, so hundreds of small function checks cost
+    one process launch instead of hundreds.
+
+    Parameters
+    ----------
+    program : CProgram
+        Program built with a test main that uses AMK_HARNESS_MAIN.
+
+    Notes
+    -----
+    Global and static variables of the tested code keep their values between the cases of one harness.
+    If a case crashes, calls exit() or times out, the harness is restarted for the next case.
+
+    Examples
+    --------
+    >>> with build_c(testmain='../tests/testmain.c').harness() as harness:
+    ...     outputs = harness.run_batch([([], '1 2\\n'), ([], '3 4\\n')])
+    """
+
+    def __init__(self, program:CProgram) -> None:
+        self.program:CProgram = program
+        self._directory:str = tempfile.mkdtemp(prefix='amk_harness_')
+        self._output_file:str = os.path.join(self._directory, 'output')
+        self._process:subprocess.Popen|None = None
+        self._replies:queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'CHarness':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _start(self) -> None:
+        """Start the harness program."""
+        env:dict[str, str] = dict(os.environ, AMK_HARNESS_DIR=self._directory)
+        self._process = subprocess.Popen([self.program.executable], cwd=self.program.cwd, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE, bufsize=0)
+        self._replies = queue.Queue()
+
+        def read_replies(stdout, replies:queue.Queue) -> None:
+            for line in stdout:
+                replies.put(line)
+            replies.put(None)
+
+        threading.Thread(target=read_replies, args=(self._process.stdout, self._replies), daemon=True).start()
+
+    def _stop(self) -> None:
+        """Kill the harness program, it is started again for the next case."""
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.kill()
+            self._process.wait()
+            self._process.stdin.close()
+            self._process.stdout.close()
+            self._process = None
+
+    def run(self, cmdline_args:list[str]=[], input:str='', timeout:int=30, max_output:int=0) -> str:
+        """Execute one test case in the harness and return its output.
+
+        Parameters
+        ----------
+        cmdline_args : list[str], optional
+            Command-line arguments passed to the test main, by default []
+        input : str, optional
+            Input of the test case, by default ''
+        timeout : int, optional
+            Maximum time in seconds for the test case, by default 30
+        max_output : int, optional
+            Maximum number of bytes of output to return, 0 means no limit, by default 0.
+            If the test case writes more, the harness is killed and restarted for the next case.
+
+        Returns
+        -------
+        str
+            Standard output of the test case, a ProcessOutput with returncode and wall_time.
+            CPU times and peak RSS are not measured per case.
+
+        Raises
+        ------
+        TimeoutExpired
+            If the test case exceeds the specified timeout. The harness is restarted for the next case.
+        """
+        encoding=locale.getpreferredencoding(False)
+        frame=bytearray(f'{len(cmdline_args)}\n'.encode())
+        for block in [arg.encode(encoding) for arg in cmdline_args]+[input.encode(encoding)]:
+            frame+=f'{len(block)}\n'.encode()+block
+
+        with self._lock:
+            if self._process is None or self._process.poll() is not None:
+                self._stop()
+                self._start()
+            try:
+                os.remove(self._output_file)
+            except OSError:
+                pass
+            start=time.perf_counter()
+            limit_reached=False
+            try:
+                self._process.stdin.write(frame)
+                deadline=time.monotonic()+timeout
+                while True:
+                    remaining=deadline-time.monotonic()
+                    if remaining<=0:
+                        raise queue.Empty
+                    try:
+                        #With a limit the size of the output file is checked while the case runs
+                        reply=self._replies.get(timeout=min(remaining, 0.05) if max_output else remaining)
+                        break
+                    except queue.Empty:
+                        if max_output and _file_size(self._output_file)>max_output:
+                            limit_reached=True
+                            reply=None
+                            break
+            except queue.Empty:
+                self._stop()
+                raise subprocess.TimeoutExpired([self.program.executable]+cmdline_args, timeout)
+            except (BrokenPipeError, OSError):
+                reply=None
+            wall_time=time.perf_counter()-start
+
+            if limit_reached:
+                #Stop the case like a program which writes too much, the harness is restarted for the next case
+                self._process.kill()
+                returncode=self._process.wait()
+                self._stop()
+            elif reply is None:
+                #The case crashed or called exit(), the exit status of the harness is the result
+                returncode=self._process.wait()
+                self._stop()
+            else:
+                returncode=int(reply)
+
+            try:
+                with open(self._output_file, 'rb') as f:
+                    data=f.read(max_output+1) if max_output else f.read()
+            except FileNotFoundError:
+                data=b''
+
+        return _output(data, max_output, returncode, wall_time)
+
+    def run_batch(self, cases:list[tuple[list[str], str]], timeout:int=30, max_output:int=0) -> list[str]:
+        """Execute the test cases one after another in the harness.
+
+        Parameters
+        ----------
+        cases : list[tuple[list[str], str]]
+            Test cases as (cmdline_args, input) pairs.
+        timeout : int, optional
+            Maximum time in seconds for each test case, by default 30
+        max_output : int, optional
+            Maximum number of bytes of output to return per case, 0 means no limit, by default 0
+
+        Returns
+        -------
+        list[str]
+            Standard output of each test case, in the same order as the cases.
+        """
+        return [self.run(cmdline_args, input, timeout, max_output) for cmdline_args, input in cases]
+
+    def close(self) -> None:
+        """Stop the harness program and remove its files."""
+        with self._lock:
+            if self._process is not None:
+                #Closing stdin ends the command loop of the harness
+                self._process.stdin.close()
+                try:
+                    self._process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    pass
+                self._stop()
+            shutil.rmtree(self._directory, ignore_errors=True)
+
+
+def _file_size(path:str) -> int:
+    """Return the size of a file in bytes, 0 if it does not exist."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def build_c(source:str='my_code.c', compiler:str='gcc', testmain:str='', enable_VS:bool=True) -> CProgram:
+    """Compile a C program and return a handle for running it.
+
+    Parameters
+    ----------
+    source : str, optional
+        Name of the C source file in the `src` directory, by default 'my_code.c'
+    compiler : str, optional
+        Compiler to use for compilation, by default 'gcc'
+    testmain : str, optional
+        Path to the test main file compiled together with the source, relative to the `src` directory.
+        When given, CLIBRARYTEST is defined as in `callCFunction`. By default '', no test main.
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+
+    Returns
+    -------
+    CProgram
+        Handle to the compiled program.
+
+    Examples
+    --------
+    >>> class TestTask(unittest.TestCase):
+    ...     @classmethod
+    ...     def setUpClass(cls):
+    ...         cls.program = build_c(testmain='../tests/testmain.c')
+    ...     def test_sum(self):
+    ...         self.assertEqual(self.program.run(['1', '2']), '3\\n')
+    """
+    if testmain:
+        #The test main is the same for every student, compile it once and link it to each program
+        harness=_compile_object(compiler, testmain, enable_VS, library_test=True, quiet=True)
+        if harness:
+            executable=_compileC(compiler, [source], enable_VS, library_test=True, objects=[harness])
+        else:
+            executable=_compileC(compiler, [source, testmain], enable_VS, library_test=True)
+    else:
+        executable=_compileC(compiler, [source], enable_VS)
+
+    return CProgram(executable, os.path.join(os.getcwd(), 'src'))
+
+
+def build_cpp(source:str='my_code.cpp', compiler:str='g++', testmain:str='', enable_VS:bool=True) -> CProgram:
+    """Compile a C++ program and return a handle for running it.
+
+    Parameters
+    ----------
+    source : str, optional
+        Name of the C++ source file in the `src` directory, by default 'my_code.cpp'
+    compiler : str, optional
+        Compiler to use for compilation, by default 'g++'
+    testmain : str, optional
+        Path to the test main file compiled together with the source, relative to the `src` directory.
+        When given, CLIBRARYTEST is defined as in `callCPPFunction`. By default '', no test main.
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+
+    Returns
+    -------
+    CProgram
+        Handle to the compiled program.
+    """
+    return build_c(source, compiler, testmain, enable_VS)
+
+
+def build_c_project(sources:list[str]=[], compiler:str='gcc', testmain:str='', enable_VS:bool=True, max_workers:int|None=None) -> CProgram:
+    """Compile a C program made of many source files and return a handle for running it.
+
+    Every translation unit is compiled into its own object file, in parallel, and the objects are linked
+    into the program. The objects are cached by the contents of the source file and the headers it
+    includes with #include "...", so after editing one file only that file is compiled again.
+
+    Parameters
+    ----------
+    sources : list[str], optional
+        Source files relative to the `src` directory, by default all `*.c` files in `src` and its subdirectories.
+    compiler : str, optional
+        Compiler to use for compilation, by default 'gcc'
+    testmain : str, optional
+        Path to the test main file linked into the program, relative to the `src` directory.
+        When given, CLIBRARYTEST is defined as in `callCFunction`. By default '', no test main.
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+    max_workers : int | None, optional
+        Maximum number of translation units compiled at the same time, by default the number of CPUs.
+
+    Returns
+    -------
+    CProgram
+        Handle to the compiled program.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no source files are found, a source file fails to compile or the program fails to link.
+
+    Examples
+    --------
+    >>> program = build_c_project()
+    >>> program.run(['input.txt'])
+    """
+    return _build_project(sources, ['.c'], compiler, testmain, enable_VS, max_workers)
+
+
+def build_cpp_project(sources:list[str]=[], compiler:str='g++', testmain:str='', enable_VS:bool=True, max_workers:int|None=None) -> CProgram:
+    """Compile a C++ program made of many source files and return a handle for running it.
+
+    Works as `build_c_project`, by default with all `*.cpp`, `*.cc` and `*.cxx` files in `src`.
+
+    Parameters
+    ----------
+    sources : list[str], optional
+        Source files relative to the `src` directory, by default all C++ source files in `src` and its subdirectories.
+    compiler : str, optional
+        Compiler to use for compilation, by default 'g++'
+    testmain : str, optional
+        Path to the test main file linked into the program, relative to the `src` directory, by default ''
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+    max_workers : int | None, optional
+        Maximum number of translation units compiled at the same time, by default the number of CPUs.
+
+    Returns
+    -------
+    CProgram
+        Handle to the compiled program.
+    """
+    return _build_project(sources, ['.cpp', '.cc', '.cxx'], compiler, testmain, enable_VS, max_workers)
+
+
+def _build_project(sources:list[str], extensions:list[str], compiler:str, testmain:str, enable_VS:bool, max_workers:int|None) -> CProgram:
+    """Compile the translation units of a project in parallel and link them, see `build_c_project`."""
+    src_directory=os.path.join(os.getcwd(), 'src')
+    if not sources:
+        sources=sorted(
+            os.path.relpath(os.path.join(root, name), src_directory)
+            for root, _, names in os.walk(src_directory)
+            for name in names if os.path.splitext(name)[1] in extensions
+        )
+        if testmain:
+            excluded=os.path.normpath(os.path.join(src_directory, testmain))
+            sources=[source for source in sources if os.path.join(src_directory, source)!=excluded]
+    if not sources:
+        raise FileNotFoundError('No source files found in '+src_directory)
+
+    library_test=bool(testmain)
+    units=sources+([testmain] if testmain else [])
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        objects=list(executor.map(lambda unit: _compile_object(compiler, unit, enable_VS, library_test), units))
+
+    if os.environ.get('AMK_COMPILE_CACHE', '1') == '0':
+        #Without the cache there is nowhere to keep the objects, compile everything at once
+        program=_compileC(compiler, units, enable_VS, library_test)
+    else:
+        if not all(objects):
+            failed=[unit for unit, obj in zip(units, objects) if not obj]
+            raise FileNotFoundError('Compilation failed: '+', '.join(failed))
+        program=_compileC(compiler, [], enable_VS, library_test, objects)
+    if not os.path.exists(program):
+        raise FileNotFoundError('Linking failed: '+program)
+
+    return CProgram(program, src_directory)
+
+
+def callC_stream(cmdline_args:list[str]=[], input:str='', timeout:int=30, compiler:str='gcc', source:str='my_code.c', enable_VS:bool=True) -> Iterator[str]:
+    """Compile a C program and yield its output line by line.
+
+    The lines are yielded as soon as the program prints them. The program is killed when the
+    iteration is stopped, so a test can stop as soon as the expected line has appeared.
+
+    Parameters
+    ----------
+    cmdline_args : list[str], optional
+        Additional command-line arguments to pass to the program, by default []
+    input : str, optional
+        Input to be passed to the program, by default ''
+    timeout : int, optional
+        Maximum time in seconds for the whole run, by default 30
+    compiler : str, optional
+        Compiler to use for compilation, by default 'gcc'
+    source : str, optional
+        Name of the C source file, by default 'my_code.c'
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+
+    Returns
+    -------
+    Iterator[str]
+        Lines of the standard output, including the line terminator.
+
+    Notes
+    -------
+        - The C library buffers output written to a pipe. If `stdbuf` is available, it is used to make
+          the output line buffered, otherwise the lines arrive when the program flushes its output.
+    """
+    program=build_c(source, compiler, enable_VS=enable_VS)
+
+    cmd_line=[program.executable]+cmdline_args
+    stdbuf=shutil.which('stdbuf')
+    if stdbuf:
+        cmd_line=[stdbuf, '-oL']+cmd_line
+
+    return _stream(cmd_line, cwd=program.cwd, input=input, timeout=timeout)
+
+
+async def acallC(cmdline_args:list[str]=[], input:str='', timeout:int=30, compiler:str='gcc', source:str='my_code.c', enable_VS:bool=True) -> str:
+    """Compile and execute a C program without blocking the event loop.
+
+    This is the asyncio counterpart of `callC`. The compilation runs in a worker thread and
+    the program is started with `asyncio.create_subprocess_exec`.
+
+    Parameters
+    ----------
+    cmdline_args : list[str], optional
+        Additional command-line arguments to pass to the program, by default []
+    input : str, optional
+        Input to be passed to the program, by default ''
+    timeout : int, optional
+        Maximum time in seconds to wait for the program to execute, by default 30
+    compiler : str, optional
+        Compiler to use for compilation, by default 'gcc'
+    source : str, optional
+        Name of the C source file, by default 'my_code.c'
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+
+    Returns
+    -------
+    str
+        Standard output generated by the executed program.
+
+    Raises
+    ------
+    TimeoutExpired
+        If the execution exceeds the specified timeout. The program is killed also if the awaiting task is cancelled.
+    """
+    program=await asyncio.to_thread(build_c, source, compiler, '', enable_VS)
+
+    return await _arun([program.executable]+cmdline_args, cwd=program.cwd, input=input, timeout=timeout)
+
+
+def callCPP_batch(cases:list[tuple[list[str], str]], timeout:int=30, compiler:str='g++', enable_VS:bool=True, max_workers:int|None=None) -> list[str]:
+    """Compile a C++ program once and execute it for every test case.
+
+    Parameters
+    ----------
+    cases : list[tuple[list[str], str]]
+        List of (cmdline_args, input) pairs, one for every execution.
+    timeout : int, optional
+        Maximum time in seconds to wait for one execution, by default 30
+    compiler : str, optional
+        Compiler to use for compilation, by default 'g++'
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+    max_workers : int | None, optional
+        Maximum number of concurrent executions, by default the ThreadPoolExecutor default
+
+    Returns
+    -------
+    list[str]
+        Standard output of every execution, in the order of the cases.
+    """
+    return callC_batch(cases, timeout, compiler, 'my_code.cpp', enable_VS, max_workers)
+
+
+def callC_batch(cases:list[tuple[list[str], str]], timeout:int=30, compiler:str='gcc', source:str='my_code.c', enable_VS:bool=True, max_workers:int|None=None) -> list[str]:
+    """Compile a C program once and execute it for every test case.
+
+    The program is compiled only once and the cases are executed concurrently.
+    The results are returned in the same order as the cases.
+
+    Parameters
+    ----------
+    cases : list[tuple[list[str], str]]
+        List of (cmdline_args, input) pairs, one for every execution.
+    timeout : int, optional
+        Maximum time in seconds to wait for one execution, by default 30
+    compiler : str, optional
+        Compiler to use for compilation, by default 'gcc'
+    source : str, optional
+        Name of the C source file, by default 'my_code.c'
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+    max_workers : int | None, optional
+        Maximum number of concurrent executions, by default the ThreadPoolExecutor default
+
+    Returns
+    -------
+    list[str]
+        Standard output of every execution, in the order of the cases.
+
+    Examples
+    --------
+    >>> outputs = callC_batch([(['1', '2'], ''), ([], '5\\n')])
+    """
+    return build_c(source, compiler, enable_VS=enable_VS).run_batch(cases, timeout, max_workers)
+
+
+def callCPPFunction_batch(cases:list[tuple[list[str], str]], timeout:int=30, compiler:str='g++', source:str='my_code.cpp', testmain:str='../tests/testmain.cpp', enable_VS:bool=True, max_workers:int|None=None) -> list[str]:
+    """Compile a C++ program with the test main once and execute it for every test case.
+
+    Parameters
+    ----------
+    cases : list[tuple[list[str], str]]
+        List of (cmdline_args, input) pairs, one for every execution.
+    timeout : int, optional
+        Maximum time in seconds to wait for one execution, by default 30
+    compiler : str, optional
+        Compiler to use for compilation, by default 'g++'
+    source : str, optional
+        Name of the C++ source file, by default 'my_code.cpp'
+    testmain : str, optional
+        Path to the test main file used for compilation, by default '../tests/testmain.cpp'
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+    max_workers : int | None, optional
+        Maximum number of concurrent executions, by default the ThreadPoolExecutor default
+
+    Returns
+    -------
+    list[str]
+        Standard output of every execution, in the order of the cases.
+    """
+    return callCFunction_batch(cases, timeout, compiler, source, testmain, enable_VS, max_workers)
+
+
+def callCFunction_batch(cases:list[tuple[list[str], str]], timeout:int=30, compiler:str='gcc', source:str='my_code.c', testmain:str='../tests/testmain.c', enable_VS:bool=True, max_workers:int|None=None) -> list[str]:
+    """Compile a C program with the test main once and execute it for every test case.
+
+    Parameters
+    ----------
+    cases : list[tuple[list[str], str]]
+        List of (cmdline_args, input) pairs, one for every execution.
+    timeout : int, optional
+        Maximum time in seconds to wait for one execution, by default 30
+    compiler : str, optional
+        Compiler to use for compilation, by default 'gcc'
+    source : str, optional
+        Name of the C source file, by default 'my_code.c'
+    testmain : str, optional
+        Path to the test main file used for compilation, by default '../tests/testmain.c'
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+    max_workers : int | None, optional
+        Maximum number of concurrent executions, by default the ThreadPoolExecutor default
+
+    Returns
+    -------
+    list[str]
+        Standard output of every execution, in the order of the cases.
+    """
+    return build_c(source, compiler, testmain, enable_VS).run_batch(cases, timeout, max_workers)
+
+
+def _compileC(compiler:str, sources:list[str], enable_VS:bool=True, library_test:bool=False, objects:list[str]=[]) -> str:
+    """Compile the sources in the `src` directory into `my_code.exe`.
+
+    Parameters
+    ----------
+    compiler : str
+        Compiler to use when Visual Studio compiler is not used.
+    sources : list[str]
+        Source files to compile, relative to the `src` directory.
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+    library_test : bool, optional
+        Flag indicating whether to define CLIBRARYTEST for the test main, by default False
+    objects : list[str], optional
+        Precompiled object files linked into the program, by default []
+
+    Returns
+    -------
+    str
+        Absolute path of the built program. This is the file in the compile cache when the cache is used,
+        so the path stays valid when `src/my_code.exe` is later replaced by another build.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no compiler is found.
+
+    Notes
+    -----
+    Every build runs in a unique temporary directory, so concurrent builds are safe. If the compilation fails,
+    the returned path does not exist and running it raises FileNotFoundError.
+
+    Successfully built programs are stored in the compile cache, keyed on the contents of the sources and
+    the headers they include with #include "...", the compiler and the flags. When nothing has changed the
+    cached program is placed in `src` without compiling. Set AMK_COMPILE_CACHE=0 to disable the cache.
+    """
+    src_directory=os.path.join(os.getcwd(), 'src')
+    executable=os.path.join(src_directory, 'my_code.exe')
+    kind, compiler_path=_find_compiler(compiler, enable_VS)
+
+    cached=''
+    if os.environ.get('AMK_COMPILE_CACHE', '1') != '0':
         try:
-            rc = subprocess.run(['cl.exe', source, testmain, '/DCLIBRARYTEST'], cwd=path+'/src', shell=True)
-            if rc.returncode!=0:
-                raise FileNotFoundError
-            VS_compile_succeed=True
-        except:
-            print('Visual Studio compile failed, trying GCC!')
-    
-    if not VS_compile_succeed:
+            key=_compile_key(compiler_path, sources, library_test, objects)
+            cached=os.path.join(_cache_directory('c'), key+'.exe')
+            if os.path.exists(cached):
+                _publish(cached, executable)
+                return cached
+        except OSError:
+            cached=''
+
+    #Compile in a directory of our own, so concurrent builds never overwrite each other's program
+    build_directory=_build_directory()
+    program=os.path.join(build_directory, 'my_code.exe')
+    paths=[os.path.join(src_directory, source) for source in sources]
+    if kind=='msvc':
+        cmd_line=[compiler_path, '/nologo']+paths+objects+['/Fe'+program, '/I'+HARNESS_INCLUDE]+(['/DCLIBRARYTEST'] if library_test else [])
+    else:
+        cmd_line=[compiler_path]+paths+objects+['-o', program, '-I', HARNESS_INCLUDE]+(['-DCLIBRARYTEST'] if library_test else [])
+    rc = subprocess.run(cmd_line, cwd=build_directory)
+
+    if rc.returncode!=0 or not os.path.exists(program):
+        #Running the returned path raises FileNotFoundError instead of running an old program
+        _finish_build(build_directory)
+        return program
+
+    if cached:
         try:
-            rc = subprocess.run([compiler, source, testmain, '-o', 'my_code.exe', '-D', 'CLIBRARYTEST'], cwd=path+'/src', shell=True)
-            if rc.returncode!=0:
-                raise FileNotFoundError
-        except:
-            print('!!Compile dropped to fallback!!')
-            rc = subprocess.run([compiler+' '+source+' '+testmain+' -o my_code.exe -DCLIBRARYTEST'], cwd=path+'/src', shell=True)
-            print("Fallback completed, don't worry")
+            _store(program, cached)
+            _finish_build(build_directory)
+            _publish(cached, executable)
+            return cached
+        except OSError:
+            pass
+
+    _finish_build(build_directory, in_use=True)
+    _publish(program, executable)
+    return program
+
+
+def _publish(program:str, executable:str) -> None:
+    """Place the built program in `src` as `my_code.exe`.
+
+    The file is replaced atomically, so a program which is running from `src` is not affected. The copy in
+    `src` is only for the user, the helpers run the program from the path returned by _compileC().
+    """
+    try:
+        _place(program, executable)
+    except OSError:
+        pass
+
+
+@functools.lru_cache(maxsize=None)
+def _find_compiler(compiler:str, enable_VS:bool=True) -> tuple[str, str]:
+    """Find the compiler to use, probing the available toolchains once per process.
+
+    Parameters
+    ----------
+    compiler : str
+        Preferred compiler, for example 'gcc' or 'g++'.
+    enable_VS : bool, optional
+        Flag indicating whether Visual Studio compiler (cl.exe) is preferred when it is available, by default True
+
+    Returns
+    -------
+    tuple[str, str]
+        Kind of the toolchain, 'msvc' or 'gnu', and the absolute path of the compiler.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no compiler is found.
+
+    Notes
+    -----
+    The compilers are searched from PATH without starting them. If the preferred compiler is not found,
+    clang and cc (clang++ and c++ for C++ compilers) are tried.
+    """
+    if enable_VS:
+        cl=shutil.which('cl')
+        if cl:
+            return 'msvc', cl
+
+    if compiler.endswith('++'):
+        candidates=[compiler, 'g++', 'clang++', 'c++']
+    else:
+        candidates=[compiler, 'gcc', 'clang', 'cc']
+    for candidate in candidates:
+        found=shutil.which(candidate)
+        if found:
+            if candidate!=compiler:
+                print(f'{compiler} not found, using {candidate}')
+            return 'gnu', found
+
+    raise FileNotFoundError('No compiler found, tried: '+', '.join((['cl'] if enable_VS else [])+candidates))
+
+
+def _compile_object(compiler:str, source:str, enable_VS:bool=True, library_test:bool=False, quiet:bool=False) -> str:
+    """Compile one translation unit into an object file in the compile cache.
+
+    The object is named by the hash of the source and the headers it includes, so it is compiled only once
+    and shared by every build that uses the same code, for example the test main of a whole class.
+
+    Parameters
+    ----------
+    compiler : str
+        Compiler to use when Visual Studio compiler is not used.
+    source : str
+        Path to the source file, relative to the `src` directory.
+    enable_VS : bool, optional
+        Flag indicating whether to enable Visual Studio compiler, by default True
+    library_test : bool, optional
+        Flag indicating whether to define CLIBRARYTEST, by default False
+    quiet : bool, optional
+        Hide the compiler messages, by default False
+
+    Returns
+    -------
+    str
+        Absolute path of the object file, or '' if the cache is disabled or the compilation failed.
+    """
+    if os.environ.get('AMK_COMPILE_CACHE', '1') == '0':
+        return ''
 
+    kind, compiler_path=_find_compiler(compiler, enable_VS)
+    try:
+        key=_compile_key(compiler_path, [source], library_test)
+        directory=_cache_directory('c', 'objects')
+    except OSError:
+        return ''
+    obj=os.path.join(directory, key+('.obj' if kind=='msvc' else '.o'))
+    if os.path.exists(obj):
+        return obj
 
+    #Compile next to the cache entry and rename, so concurrent builds never see a partial object
+    fd, tmp=tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix=os.path.splitext(obj)[1])
+    os.close(fd)
+    defines=(['/DCLIBRARYTEST'] if kind=='msvc' else ['-DCLIBRARYTEST']) if library_test else []
     try:
-        cmd_line=['./my_code.exe']+cmdline_args
-        rc = subprocess.run(cmd_line, cwd=path+'/src', stdout=subprocess.PIPE, text=True, input=input, timeout=timeout)
+        if kind=='msvc':
+            cmd_line=[compiler_path, '/nologo', '/c', source, '/Fo'+tmp, '/I'+HARNESS_INCLUDE]+defines
+        else:
+            cmd_line=[compiler_path, '-c', source, '-o', tmp, '-I', HARNESS_INCLUDE]+defines
+        output=subprocess.DEVNULL if quiet else None
+        rc = subprocess.run(cmd_line, cwd=os.path.join(os.getcwd(), 'src'), stdout=output, stderr=output)
         if rc.returncode!=0:
-            raise FileNotFoundError
-    except:
-        print('!!Running dropped to fallback!!')
-        cmd_line=[path+'\\src\\my_code.exe']+cmdline_args
-        rc = subprocess.run(cmd_line, cwd=path+'/src', stdout=subprocess.PIPE, text=True, input=input, timeout=timeout)
-        print("Fallback completed, don't worry")
-
-    return rc.stdout
\ No newline at end of file
+            return ''
+        os.replace(tmp, obj)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    return obj
+
+
+def _compile_key(compiler_path:str, sources:list[str], library_test:bool, objects:list[str]=[]) -> str:
+    """Return the compile cache key of the sources in the `src` directory.
+
+    Parameters
+    ----------
+    compiler_path : str
+        Path of the compiler returned by _find_compiler().
+    sources : list[str]
+        Source files, relative to the `src` directory.
+    library_test : bool
+        Flag indicating whether CLIBRARYTEST is defined.
+    objects : list[str], optional
+        Object files from the compile cache linked into the program, by default []
+
+    Returns
+    -------
+    str
+        Hex digest of the compiler, the flags and the contents of the sources and their local headers.
+
+    Raises
+    ------
+    OSError
+        If a source file cannot be read.
+    """
+    src_directory=os.path.join(os.getcwd(), 'src')
+    digest=hashlib.sha256()
+    try:
+        compiler_stat=os.stat(compiler_path)
+        compiler_id=f'{compiler_path}:{compiler_stat.st_size}:{compiler_stat.st_mtime_ns}'
+    except OSError:
+        compiler_id=compiler_path
+    #Cached objects are named by the hash of their own sources
+    objects=[os.path.basename(obj) for obj in objects]
+    digest.update(repr((_COMPILE_CACHE_VERSION, sys.platform, compiler_id, library_test, sources, objects)).encode())
+
+    #Hash every file once, in the order in which the includes are found
+    pending=[os.path.normpath(os.path.join(src_directory, source)) for source in sources]
+    seen=set()
+    while pending:
+        file=pending.pop(0)
+        if file in seen:
+            continue
+        seen.add(file)
+        with open(file, 'rb') as f:
+            content=f.read()
+        digest.update(os.path.relpath(file, src_directory).encode()+b'\0'+len(content).to_bytes(8, 'big')+content)
+        for include in _INCLUDE_PATTERN.findall(content):
+            name=include.decode(errors='replace')
+            for directory in (os.path.dirname(file), src_directory, HARNESS_INCLUDE):
+                candidate=os.path.normpath(os.path.join(directory, name))
+                if os.path.isfile(candidate):
+                    pending.append(candidate)
+                    break
+
+    return digest.hexdigest()
@@ -0,0 +1,145 @@
+/*
+ * amk_harness.h - persistent test harness for amk_testhelpers
+ *
+ * Define the test main with AMK_HARNESS_MAIN instead of main():
+ *
+ *     #include "amk_harness.h"
+ *
+ *     AMK_HARNESS_MAIN
+ *     {
+ *         int a, b;
+ *         scanf("%d %d", &a, &b);
+ *         printf("%d\n", add(a, b));
+ *         return 0;
+ *     }
+ *
+ * The body receives argc and argv like main(). Run normally, the program behaves exactly like
+ * a program with that main(). Started by CHarness (AMK_HARNESS_DIR is set), it runs the body once
+ * for every test case sent by Python, so many cases cost only one process launch.
+ *
+ * Protocol: for every case Python writes to stdin the number of arguments, then every argument and
+ * the input as "<length>\n<bytes>". The input is written to AMK_HARNESS_DIR/input and opened as stdin,
+ * stdout is redirected to AMK_HARNESS_DIR/output, and after the body returns its return value is
+ * written to the original stdout as "<status>\n".
+ */
+#ifndef AMK_HARNESS_H
+#define AMK_HARNESS_H
+
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+#ifdef _WIN32
+#include <io.h>
+#define amk_dup _dup
+#define amk_fdopen _fdopen
+#else
+#include <unistd.h>
+#define amk_dup dup
+#define amk_fdopen fdopen
+#endif
+
+typedef int (*amk_test_function)(int argc, char **argv);
+
+/* Read one "<length>\n<bytes>" block, the result is NUL terminated */
+static char *amk_read_block(FILE *in, size_t *size)
+{
+    unsigned long length;
+    char *data;
+
+    if (fscanf(in, "%lu", &length) != 1 || fgetc(in) != '\n')
+        return NULL;
+    data = (char *)malloc(length + 1);
+    if (data == NULL)
+        return NULL;
+    if (fread(data, 1, length, in) != length) {
+        free(data);
+        return NULL;
+    }
+    data[length] = '\0';
+    if (size != NULL)
+        *size = length;
+    return data;
+}
+
+static char *amk_join_path(const char *directory, const char *name)
+{
+    size_t length = strlen(directory) + strlen(name) + 2;
+    char *path = (char *)malloc(length);
+
+    if (path != NULL)
+        snprintf(path, length, "%s/%s", directory, name);
+    return path;
+}
+
+static int amk_harness_main(int argc, char **argv, amk_test_function test)
+{
+    const char *directory = getenv("AMK_HARNESS_DIR");
+    char *input_path, *output_path;
+    FILE *commands, *replies;
+
+    if (directory == NULL || directory[0] == '\0')
+        return test(argc, argv);
+
+    /* Keep the command channel, stdin and stdout are replaced for every case */
+    commands = amk_fdopen(amk_dup(0), "rb");
+    replies = amk_fdopen(amk_dup(1), "wb");
+    input_path = amk_join_path(directory, "input");
+    output_path = amk_join_path(directory, "output");
+    if (commands == NULL || replies == NULL || input_path == NULL || output_path == NULL)
+        return 1;
+
+    for (;;) {
+        unsigned long count, i;
+        char **args;
+        char *input;
+        size_t input_size = 0;
+        FILE *file;
+        int status;
+
+        if (fscanf(commands, "%lu", &count) != 1 || fgetc(commands) != '\n')
+            break;
+        args = (char **)calloc(count + 2, sizeof(char *));
+        if (args == NULL)
+            return 1;
+        args[0] = argv[0];
+        for (i = 0; i < count; i++) {
+            args[i + 1] = amk_read_block(commands, NULL);
+            if (args[i + 1] == NULL)
+                return 1;
+        }
+        input = amk_read_block(commands, &input_size);
+        if (input == NULL)
+            return 1;
+
+        file = fopen(input_path, "wb");
+        if (file == NULL)
+            return 1;
+        fwrite(input, 1, input_size, file);
+        fclose(file);
+        if (freopen(input_path, "r", stdin) == NULL || freopen(output_path, "w", stdout) == NULL)
+            return 1;
+
+        status = test((int)count + 1, args);
+        fflush(stdout);
+
+        for (i = 0; i < count; i++)
+            free(args[i + 1]);
+        free(args);
+        free(input);
+
+        fprintf(replies, "%d\n", status);
+        fflush(replies);
+    }
+
+    free(input_path);
+    free(output_path);
+    return 0;
+}
+
+#define AMK_HARNESS_MAIN \
+    static int amk_test_main(int argc, char **argv); \
+    int main(int argc, char **argv) { return amk_harness_main(argc, argv, amk_test_main); } \
+    static int amk_test_main(int argc, char **argv)
+
+#endif /* AMK_HARNESS_H */
@@ -7,8 +7,14 @@ This submodule provides functions for:
 from amk_testhelpers.dotnet.dotnethelpers import(
     callDotNetFunction,
     callDotNet,
-    dotNetNumbersFormat
-    
+    dotNetNumbersFormat,
+    callDotNet_batch,
+    callDotNetFunction_batch,
+    acallDotNet,
+    callDotNet_stream,
+    stop_dotnet_build_servers,
+    build_dotnet,
+    DotNetProgram
 )
 
-__all__ = ['callDotNetFunction', 'callDotNet','dotNetNumbersFormat']
\ No newline at end of file
+__all__ = ['callDotNetFunction', 'callDotNet','dotNetNumbersFormat', 'callDotNet_batch', 'callDotNetFunction_batch', 'acallDotNet', 'callDotNet_stream', 'stop_dotnet_build_servers', 'build_dotnet', 'DotNetProgram']
\ No newline at end of file
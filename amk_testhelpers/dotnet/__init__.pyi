@@ -1,6 +1,12 @@
 from .dotnethelpers import(
     callDotNetFunction as callDotNetFunction,
     callDotNet as callDotNet,
-    dotNetNumbersFormat as dotNetNumbersFormat
-    
+    dotNetNumbersFormat as dotNetNumbersFormat,
+    callDotNet_batch as callDotNet_batch,
+    callDotNetFunction_batch as callDotNetFunction_batch,
+    acallDotNet as acallDotNet,
+    callDotNet_stream as callDotNet_stream,
+    stop_dotnet_build_servers as stop_dotnet_build_servers,
+    build_dotnet as build_dotnet,
+    DotNetProgram as DotNetProgram
 )
\ No newline at end of file
@@ -5,18 +5,41 @@ Module for handling various utility functions and executing code for testing pur
 This module provides functions for running .NET code snippets for testing purposes.
 It includes functions for executing code, handling file paths, and interacting with subprocesses.
 
+Classes
+-------
+    - DotNetProgram: Built program shared by many runs, with run() and run_batch() methods.
+
 Functions
 ---------
     - dotNetProjectName(): Retrieves the name of the .NET project.
     - dotNetNumbersFormat(): Retrieves the decimal and separator format for .NET.
     - callDotNet(): Executes .NET code.
     - callDotNetFunction(): Executes .NET code along with a specific function.
+    - build_dotnet(): Builds the project once and returns a DotNetProgram handle for running it many times.
+    - callDotNet_stream(): Executes .NET code and yields the output line by line.
+    - acallDotNet(): asyncio counterpart of callDotNet().
+    - callDotNet_batch(), callDotNetFunction_batch(): Build once and execute the program for many test cases.
+    - stop_dotnet_build_servers(): Stops the build servers kept running between builds.
 """
 
 import subprocess
 import os
 import shutil
 import glob
+import hashlib
+import threading
+import functools
+from xml.etree import ElementTree
+import concurrent.futures
+import asyncio
+from collections.abc import Iterator
+
+from amk_testhelpers._cache import _build_directory, _finish_build
+from amk_testhelpers._process import _arun, _run, _stream
+
+
+#Builds of the same project must not overlap
+_build_lock = threading.RLock()
 
 
 def dotNetProjectName() -> str:
@@ -70,13 +93,13 @@ def dotNetNumbersFormat() -> tuple[str, str]:
     return neg, sep
 
 
-def callDotNet(cmdline_args:list[str] = [], input:str='', timeout:int=30, build:bool=True) -> str:
+def callDotNet(cmdline_args:list[str] = [], input:str='', timeout:int=30, build:bool=True, max_output:int=0) -> str:
     """Execute a .NET program and return the output.
 
     This function compiles and executes a .NET program located in the `src` directory of the current project. 
-    It first cleans up any temporary directories created during previous builds if the `build` parameter is set to True. 
-    Then, it compiles the source code using the `dotnet build` command. 
-    If the compilation fails, it falls back to a second attempt to compile using the same command. 
+    If the `build` parameter is set to True, the project is built unless its sources are unchanged since the last build.
+    Then, it compiles the source code incrementally using the `dotnet build` command, keeping the build servers warm. 
+    The built assembly is located from the project file and started with `dotnet <assembly>.dll`. 
     Finally, it executes the compiled program and returns the standard output.
 
     Parameters
@@ -89,11 +112,15 @@ def callDotNet(cmdline_args:list[str] = [], input:str='', timeout:int=30, build:
         Maximum time in seconds to wait for the program to execute, by default 30
     build : bool, optional
         Flag indicating whether to perform a build before execution, by default True
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit, by default 0
 
     Returns
     -------
     str
         Standard output generated by the executed program.
+        If the output limit is reached, the program is stopped and the returned output has 'truncated' set to True.
+        The exit status, wall-clock time, CPU times and peak RSS of the run are available as attributes, see ProcessOutput.
 
     Raises
     ------
@@ -108,46 +135,18 @@ def callDotNet(cmdline_args:list[str] = [], input:str='', timeout:int=30, build:
     -------
     The behavior of this function may vary depending on the environment and system configuration.
     """
-    path=os.getcwd()
-    project_name=dotNetProjectName()
-
-    tmp_directories=['bin', 'obj']
     if build:
-        for d in tmp_directories:
-            try:
-                shutil.rmtree(d)
-            except:
-                pass
-    
-    #Compile the source code
-    #shutil.copy2('tests/my_code.csproj', 'src/my_code.csproj')
-    if build:
-        try:
-            rc = subprocess.run(['dotnet', 'build'], cwd=path, shell=True)
-            if rc.returncode!=0:
-                raise FileNotFoundError
-        except:
-            print('!!Compile falled to fallback!!')
-            rc = subprocess.run(['dotnet build'], cwd=path, shell=True)
-            print("Fallback completed, don't worry")
+        _buildDotNet()
 
-    try:
-        cmd_line=['bin/Debug/net6.0/'+project_name+'.exe',]+cmdline_args
-        rc = subprocess.run(cmd_line, cwd=path+'/src', stdout=subprocess.PIPE, text=True, input=input, timeout=timeout)
-    except:
-        print('!!Running falled to fallback!!')
-        cmd_line=['../bin/Debug/net6.0/'+project_name,]+cmdline_args
-        rc = subprocess.run(cmd_line, cwd=path+'/src', stdout=subprocess.PIPE, text=True, input=input, timeout=timeout)
-        print("Fallback completed, don't worry")
-
-    return rc.stdout
+    return _runDotNet(cmdline_args, input, timeout, max_output)
 
-def callDotNetFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30, build:bool=True) -> str:
+def callDotNetFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30, build:bool=True, max_output:int=0) -> str:
     """Execute a .NET program and return the output.
 
     This function compiles and executes a .NET program located in the `src` directory of the current project. 
-    It first cleans up any temporary directories created during previous builds if the `build` parameter is set to True.
-    Then, it compiles the source code using the `dotnet build` command. If the compilation fails, it falls back to a second attempt to compile using the same command. 
+    If the `build` parameter is set to True, the project is built unless its sources are unchanged since the last build.
+    Then, it compiles the source code incrementally using the `dotnet build` command, keeping the build servers warm.
+    The built assembly is located from the project file and started with `dotnet <assembly>.dll`. 
     Finally, it executes the compiled program and returns the standard output.
 
     Parameters
@@ -160,11 +159,15 @@ def callDotNetFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30,
         Maximum time in seconds to wait for the program to execute, by default 30
     build : bool, optional
         Flag indicating whether to perform a build before execution, by default True
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit, by default 0
 
     Returns
     -------
     str
         Standard output generated by the executed program.
+        If the output limit is reached, the program is stopped and the returned output has 'truncated' set to True.
+        The exit status, wall-clock time, CPU times and peak RSS of the run are available as attributes, see ProcessOutput.
 
     Raises
     ------
@@ -179,43 +182,522 @@ def callDotNetFunction(cmdline_args:list[str]=[], input:str='', timeout:int=30,
     -------
     The behavior of this function may vary depending on the environment and system configuration.
     """
+    if build:
+        _buildDotNet(function=True)
+
+    return _runDotNet(cmdline_args, input, timeout, max_output)
+
+
+class DotNetProgram:
+    """Built .NET program which is shared by many runs.
+
+    The handle is returned by `build_dotnet`. The build output is copied into a directory of its own,
+    so every run of the handle uses the same artifact even if the project is built again, for example
+    in the other mode by `callDotNet` or `callDotNetFunction`.
+
+    Parameters
+    ----------
+    assembly : str
+        Absolute path of the program's '.dll' file.
+    cwd : str
+        Working directory of the program, the `src` directory of the project.
+    directory : str, optional
+        Directory holding the copy of the build output, removed by close(), by default ''
+
+    Examples
+    --------
+    >>> class TestTask(unittest.TestCase):
+    ...     @classmethod
+    ...     def setUpClass(cls):
+    ...         cls.program = build_dotnet(function=True)
+    ...     @classmethod
+    ...     def tearDownClass(cls):
+    ...         cls.program.close()
+    ...     def test_sum(self):
+    ...         self.assertEqual(self.program.run(['1', '2']), '3\\n')
+
+    >>> with build_dotnet() as program:
+    ...     outputs = program.run_batch([([], '1\\n'), ([], '2\\n')])
+    """
+
+    def __init__(self, assembly:str, cwd:str, directory:str='') -> None:
+        self.assembly:str = assembly
+        self.cwd:str = cwd
+        self._directory:str = directory
+
+    def __repr__(self) -> str:
+        return f'DotNetProgram({self.assembly!r})'
+
+    def __enter__(self) -> 'DotNetProgram':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def run(self, cmdline_args:list[str]=[], input:str='', timeout:int=30, max_output:int=0) -> str:
+        """Execute the program and return the output.
+
+        Parameters
+        ----------
+        cmdline_args : list[str], optional
+            Additional command-line arguments to pass to the program, by default []
+        input : str, optional
+            Input to be passed to the program, by default ''
+        timeout : int, optional
+            Maximum time in seconds to wait for the program to execute, by default 30
+        max_output : int, optional
+            Maximum number of bytes of output to capture, 0 means no limit, by default 0
+
+        Returns
+        -------
+        str
+            Standard output generated by the executed program.
+            If the output limit is reached, the program is stopped and the returned output has 'truncated' set to True.
+            The exit status, wall-clock time, CPU times and peak RSS of the run are available as attributes, see ProcessOutput.
+
+        Raises
+        ------
+        TimeoutExpired
+            If the execution exceeds the specified timeout.
+        """
+        return _run([_dotnet(), self.assembly]+cmdline_args, cwd=self.cwd, input=input, timeout=timeout, max_output=max_output).stdout
+
+    def run_batch(self, cases:list[tuple[list[str], str]], timeout:int=30, max_workers:int|None=None, max_output:int=0) -> list[str]:
+        """Execute the program concurrently for every test case.
+
+        Parameters
+        ----------
+        cases : list[tuple[list[str], str]]
+            Test cases as (cmdline_args, input) pairs.
+        timeout : int, optional
+            Maximum time in seconds for each run, by default 30
+        max_workers : int | None, optional
+            Maximum number of programs running at the same time, by default chosen by ThreadPoolExecutor.
+        max_output : int, optional
+            Maximum number of bytes of output to capture per run, 0 means no limit, by default 0
+
+        Returns
+        -------
+        list[str]
+            Standard output of each run, in the same order as the cases.
+        """
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures=[executor.submit(self.run, cmdline_args, input, timeout, max_output) for cmdline_args, input in cases]
+            return [future.result() for future in futures]
+
+    def close(self) -> None:
+        """Remove the copy of the build output. The handle can't be run after this."""
+        if self._directory:
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._directory=''
+
+
+def build_dotnet(function:bool=False) -> DotNetProgram:
+    """Build the .NET project once and return a handle for running it.
+
+    The hidden test main is swapped in and the project is built once, then every run of the returned
+    handle uses the same artifact. Build in `setUpClass` or use the handle as a context manager, so a test
+    class does one build instead of one per test method.
+
+    Parameters
+    ----------
+    function : bool, optional
+        Flag indicating whether to build with the hidden test main 'tests/testmain.cs.hidden' as
+        `callDotNetFunction` does, by default False
+
+    Returns
+    -------
+    DotNetProgram
+        Handle to the built program. Call close() or use it in a with statement to remove its files,
+        otherwise they are removed when the process exits.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the build produced no program.
+    """
     path=os.getcwd()
-    project_name=dotNetProjectName()
 
-    tmp_directories=['bin', 'obj']
+    with _build_lock:
+        _buildDotNet(function)
+        assembly=_builtAssembly()
+        #Copy the whole output directory, the runtime needs the .deps.json and .runtimeconfig.json files
+        directory=_build_directory('amk_dotnet_')
+        shutil.copytree(os.path.dirname(assembly), directory, dirs_exist_ok=True)
+    _finish_build(directory, in_use=True)
+
+    return DotNetProgram(os.path.join(directory, os.path.basename(assembly)), os.path.join(path, 'src'), directory)
+
+
+def callDotNet_stream(cmdline_args:list[str]=[], input:str='', timeout:int=30, build:bool=True) -> Iterator[str]:
+    """Build a .NET program and yield its output line by line.
+
+    The lines are yielded as soon as the program prints them. The program is killed when the
+    iteration is stopped, so a test can stop as soon as the expected line has appeared.
+
+    Parameters
+    ----------
+    cmdline_args : list[str], optional
+        Additional command-line arguments to pass to the program, by default []
+    input : str, optional
+        Input to be passed to the program, by default ''
+    timeout : int, optional
+        Maximum time in seconds for the whole run, by default 30
+    build : bool, optional
+        Flag indicating whether to perform a build before execution, by default True
+
+    Returns
+    -------
+    Iterator[str]
+        Lines of the standard output, including the line terminator.
+
+    Raises
+    ------
+    FileNotFoundError
+        If there is an error during compilation.
+    """
     if build:
-        for d in tmp_directories:
-            try:
-                shutil.rmtree(d)
-            except:
-                pass
+        _buildDotNet()
+
+    path=os.getcwd()
+    return _stream([_dotnet(), _builtAssembly()]+cmdline_args, cwd=path+'/src', input=input, timeout=timeout)
+
 
-    #shutil.copy2('tests/testmain.cs', 'src/testmain.cs')
-    #shutil.copy2('tests/my_code.csproj', 'src/my_code.csproj')
-    #Compile the source code
+async def acallDotNet(cmdline_args:list[str]=[], input:str='', timeout:int=30, build:bool=True) -> str:
+    """Build and execute a .NET program without blocking the event loop.
+
+    This is the asyncio counterpart of `callDotNet`. The build runs in a worker thread and
+    the program is started with `asyncio.create_subprocess_exec`.
+
+    Parameters
+    ----------
+    cmdline_args : list[str], optional
+        Additional command-line arguments to pass to the program, by default []
+    input : str, optional
+        Input to be passed to the program, by default ''
+    timeout : int, optional
+        Maximum time in seconds to wait for the program to execute, by default 30
+    build : bool, optional
+        Flag indicating whether to perform a build before execution, by default True
+
+    Returns
+    -------
+    str
+        Standard output generated by the executed program.
+
+    Raises
+    ------
+    FileNotFoundError
+        If there is an error during compilation.
+    TimeoutExpired
+        If the execution exceeds the specified timeout. The program is killed also if the awaiting task is cancelled.
+    """
+    if build:
+        await asyncio.to_thread(_buildDotNet)
+
+    path=os.getcwd()
+    return await _arun([_dotnet(), _builtAssembly()]+cmdline_args, cwd=path+'/src', input=input, timeout=timeout)
+
+
+def callDotNet_batch(cases:list[tuple[list[str], str]], timeout:int=30, build:bool=True, max_workers:int|None=None) -> list[str]:
+    """Build a .NET program once and execute it for every test case.
+
+    The program is built only once and the cases are executed concurrently.
+    The results are returned in the same order as the cases.
+
+    Parameters
+    ----------
+    cases : list[tuple[list[str], str]]
+        List of (cmdline_args, input) pairs, one for every execution.
+    timeout : int, optional
+        Maximum time in seconds to wait for one execution, by default 30
+    build : bool, optional
+        Flag indicating whether to perform a build before execution, by default True
+    max_workers : int | None, optional
+        Maximum number of concurrent executions, by default the ThreadPoolExecutor default
+
+    Returns
+    -------
+    list[str]
+        Standard output of every execution, in the order of the cases.
+
+    Examples
+    --------
+    >>> outputs = callDotNet_batch([(['1', '2'], ''), ([], '5\\n')])
+    """
     if build:
-        if os.path.exists('tests/testmain.cs.hidden'):
+        _buildDotNet()
+
+    return _runDotNet_batch(cases, timeout, max_workers)
+
+
+def callDotNetFunction_batch(cases:list[tuple[list[str], str]], timeout:int=30, build:bool=True, max_workers:int|None=None) -> list[str]:
+    """Build a .NET program with the hidden test main once and execute it for every test case.
+
+    Parameters
+    ----------
+    cases : list[tuple[list[str], str]]
+        List of (cmdline_args, input) pairs, one for every execution.
+    timeout : int, optional
+        Maximum time in seconds to wait for one execution, by default 30
+    build : bool, optional
+        Flag indicating whether to perform a build before execution, by default True
+    max_workers : int | None, optional
+        Maximum number of concurrent executions, by default the ThreadPoolExecutor default
+
+    Returns
+    -------
+    list[str]
+        Standard output of every execution, in the order of the cases.
+    """
+    if build:
+        _buildDotNet(function=True)
+
+    return _runDotNet_batch(cases, timeout, max_workers)
+
+
+def _buildDotNet(function:bool=False) -> None:
+    """Build the .NET project in the current directory if its sources have changed.
+
+    Parameters
+    ----------
+    function : bool, optional
+        Flag indicating whether to build with the hidden test main 'tests/testmain.cs.hidden', by default False
+
+    Raises
+    ------
+    FileNotFoundError
+        If the build fails.
+
+    Notes
+    -----
+    A hash of the project files, the C# sources, the hidden test main and the build mode is stored in
+    'obj/amk_build.stamp' after a successful build. When the hash has not changed and the program exists,
+    the build is skipped. Otherwise 'dotnet build' runs incrementally, without deleting 'bin' and 'obj'.
+    If the build fails, the program of the previous build is removed.
+
+    The build keeps the MSBuild nodes, the MSBuild server and the C# compiler server running, so later builds in
+    the grading session start warm. Use stop_dotnet_build_servers() to stop them.
+    """
+    path=os.getcwd()
+
+    with _build_lock:
+        stamp_file=os.path.join(path, 'obj', 'amk_build.stamp')
+        key=_dotNetBuildKey(function)
+        try:
+            with open(stamp_file, 'r') as f:
+                if f.read()==key and os.path.exists(_dotNetAssembly()):
+                    return
+        except OSError:
+            pass
+        try:
+            os.remove(stamp_file)
+        except OSError:
+            pass
+
+        #shutil.copy2('tests/testmain.cs', 'src/testmain.cs')
+        #shutil.copy2('tests/my_code.csproj', 'src/my_code.csproj')
+        #Compile the source code
+        hidden_testmain=function and os.path.exists('tests/testmain.cs.hidden')
+        if hidden_testmain:
             shutil.copyfile('tests/testmain.cs.hidden', 'tests/testmain.cs')
         try:
-            rc = subprocess.run(['dotnet', 'build'], cwd=path, shell=True)
-            if rc.returncode!=0:
-                raise FileNotFoundError
-        except:
-            print('!!Compile falled to fallback!!')
-            rc = subprocess.run(['dotnet build'], cwd=path, shell=True)
-            print("Fallback completed, don't worry")
+            rc = subprocess.run([_dotnet(), 'build', '--nologo', '-nodeReuse:true', '-p:UseSharedCompilation=true'], cwd=path, env=_dotNetEnvironment())
         finally:
-            if os.path.exists('tests/testmain.cs.hidden'):
+            if hidden_testmain:
                 os.remove('tests/testmain.cs')
 
+        if rc.returncode!=0:
+            #Remove the program of the previous build, so a broken project is never run with stale code
+            try:
+                os.remove(_dotNetAssembly())
+            except OSError:
+                pass
+            raise FileNotFoundError('dotnet build failed with exit code '+str(rc.returncode))
+
+        os.makedirs(os.path.dirname(stamp_file), exist_ok=True)
+        with open(stamp_file, 'w') as f:
+            f.write(key)
+
+
+def _dotNetBuildKey(function:bool=False) -> str:
+    """Return a hash of everything that affects the build of the project in the current directory.
+
+    Parameters
+    ----------
+    function : bool, optional
+        Flag indicating whether the build uses the hidden test main, by default False
+
+    Returns
+    -------
+    str
+        Hex digest of the build mode and the contents of the project files, the C# sources outside
+        'bin' and 'obj' and the hidden test main.
+    """
+    path=os.getcwd()
+    digest=hashlib.sha256(repr(('function', function)).encode())
+
+    files=[]
+    for root, directories, names in os.walk(path):
+        directories[:]=sorted(d for d in directories if d not in ('bin', 'obj') and not d.startswith('.'))
+        for name in sorted(names):
+            if name.endswith(('.cs', '.csproj', '.props', '.targets')) or name in ('global.json', 'NuGet.Config', 'nuget.config'):
+                files.append(os.path.join(root, name))
+    if function and os.path.exists('tests/testmain.cs.hidden'):
+        files.append(os.path.join(path, 'tests', 'testmain.cs.hidden'))
+
+    for file in files:
+        with open(file, 'rb') as f:
+            content=f.read()
+        digest.update(os.path.relpath(file, path).encode()+b'\0'+len(content).to_bytes(8, 'big')+content)
+
+    return digest.hexdigest()
+
+
+@functools.lru_cache(maxsize=None)
+def _dotnet() -> str:
+    """Return the path of the dotnet command.
+
+    Raises
+    ------
+    FileNotFoundError
+        If dotnet is not found in PATH.
+    """
+    dotnet=shutil.which('dotnet')
+    if not dotnet:
+        raise FileNotFoundError('dotnet not found in PATH')
+    return dotnet
+
+
+def _dotNetEnvironment() -> dict[str, str]:
+    """Return the environment for dotnet build, with the build servers enabled unless configured otherwise."""
+    env=dict(os.environ)
+    env.setdefault('DOTNET_CLI_USE_MSBUILD_SERVER', '1')
+    env.setdefault('DOTNET_CLI_TELEMETRY_OPTOUT', '1')
+    env.setdefault('DOTNET_NOLOGO', '1')
+    return env
+
+
+def stop_dotnet_build_servers() -> None:
+    """Stop the MSBuild nodes, the MSBuild server and the C# compiler server.
+
+    The .NET helpers leave the build servers running, so the builds of a grading session start warm.
+    The servers also stop by themselves after being idle for a while.
+    """
+    try:
+        subprocess.run([_dotnet(), 'build-server', 'shutdown'], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except FileNotFoundError:
+        pass
+
 
+def _dotNetProperties() -> dict[str, str]:
+    """Read the properties which locate the build output from the project file.
+
+    Returns
+    -------
+    dict[str, str]
+        TargetFramework, AssemblyName, Configuration and OutputPath. The first framework of TargetFrameworks is used
+        when TargetFramework is not set, AssemblyName defaults to the project name and Configuration to Debug.
+    """
+    project_name=dotNetProjectName()
+    properties={'TargetFramework': '', 'AssemblyName': project_name, 'Configuration': 'Debug', 'OutputPath': ''}
     try:
-        cmd_line=['bin/Debug/net6.0/'+project_name+'.exe',]+cmdline_args
-        rc = subprocess.run(cmd_line, cwd=path+'/src', stdout=subprocess.PIPE, text=True, input=input, timeout=timeout)
-    except:
-        print('!!Running falled to fallback!!')
-        cmd_line=['../bin/Debug/net6.0/'+project_name,]+cmdline_args
-        rc = subprocess.run(cmd_line, cwd=path+'/src', stdout=subprocess.PIPE, text=True, input=input, timeout=timeout)
-        print("Fallback completed, don't worry")
-
-    return rc.stdout
\ No newline at end of file
+        root=ElementTree.parse(project_name+'.csproj').getroot()
+    except (OSError, ElementTree.ParseError):
+        return properties
+
+    for element in root.iter():
+        name=element.tag.split('}')[-1]
+        value=(element.text or '').strip()
+        #Conditional values and MSBuild expressions can't be evaluated here
+        if not value or '$(' in value or element.get('Condition'):
+            continue
+        if name in properties and name!='TargetFramework':
+            properties[name]=value
+        elif name=='TargetFramework':
+            properties['TargetFramework']=value
+        elif name=='TargetFrameworks' and not properties['TargetFramework']:
+            properties['TargetFramework']=value.split(';')[0].strip()
+    return properties
+
+
+def _dotNetAssembly() -> str:
+    """Return the absolute path of the built .NET assembly.
+
+    Returns
+    -------
+    str
+        Path of the '.dll' file of the program. The path is taken from the target framework, assembly name and
+        output path of the project file. If it does not exist, the newest matching '.dll' under 'bin' is used.
+    """
+    path=os.getcwd()
+    properties=_dotNetProperties()
+    assembly=properties['AssemblyName']+'.dll'
+
+    if properties['OutputPath']:
+        output=os.path.join(path, properties['OutputPath'].replace('\\', os.sep))
+    else:
+        output=os.path.join(path, 'bin', properties['Configuration'], properties['TargetFramework'])
+    candidate=os.path.join(output, assembly)
+    if properties['TargetFramework'] and os.path.exists(candidate):
+        return candidate
+    candidate_tfm=os.path.join(output, properties['TargetFramework'], assembly)
+    if properties['OutputPath'] and os.path.exists(candidate_tfm):
+        return candidate_tfm
+
+    found=glob.glob(os.path.join(path, 'bin', '**', assembly), recursive=True)
+    if found:
+        return max(found, key=os.path.getmtime)
+    return candidate
+
+
+def _builtAssembly() -> str:
+    """Return the absolute path of the built .NET assembly, see _dotNetAssembly().
+
+    Raises
+    ------
+    FileNotFoundError
+        If the program has not been built or its last build failed.
+    """
+    assembly=_dotNetAssembly()
+    if not os.path.exists(assembly):
+        raise FileNotFoundError('Build output not found: '+assembly)
+    return assembly
+
+
+def _runDotNet(cmdline_args:list[str]=[], input:str='', timeout:int=30, max_output:int=0) -> str:
+    """Execute the built .NET program and return its standard output.
+
+    Parameters
+    ----------
+    cmdline_args : list[str], optional
+        Additional command-line arguments to pass to the program, by default []
+    input : str, optional
+        Input to be passed to the program, by default ''
+    timeout : int, optional
+        Maximum time in seconds to wait for the program to execute, by default 30
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit, by default 0
+
+    Returns
+    -------
+    str
+        Standard output generated by the executed program.
+
+    Notes
+    -----
+    The program is started with 'dotnet <assembly>.dll', so it works on every platform and target framework.
+    """
+    path=os.getcwd()
+    cmd_line=[_dotnet(), _builtAssembly()]+cmdline_args
+    rc = _run(cmd_line, cwd=path+'/src', input=input, timeout=timeout, max_output=max_output)
+
+    return rc.stdout
+
+
+def _runDotNet_batch(cases:list[tuple[list[str], str]], timeout:int=30, max_workers:int|None=None) -> list[str]:
+    """Execute the built .NET program concurrently for every (cmdline_args, input) pair."""
+    _builtAssembly()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures=[executor.submit(_runDotNet, cmdline_args, input, timeout) for cmdline_args, input in cases]
+        return [future.result() for future in futures]
@@ -13,7 +13,15 @@ from amk_testhelpers.python.pythonhelpers import (
     callpythonmaincode,
     callpython_subprocess,
     load_python_code,
-    loadmycode
+    loadmycode,
+    start_python_workers,
+    stop_python_workers,
+    callpython_batch,
+    acallpython,
+    acallpythoncode,
+    callpython_future,
+    callpython_stream
 )
 
-__all__ = ['callpython', 'callpythoncode', 'callpythonmaincode', 'callpython_subprocess', 'load_python_code', 'loadmycode']
+__all__ = ['callpython', 'callpythoncode', 'callpythonmaincode', 'callpython_subprocess', 'load_python_code', 'loadmycode',
+           'start_python_workers', 'stop_python_workers', 'callpython_batch', 'acallpython', 'acallpythoncode', 'callpython_future', 'callpython_stream']
@@ -4,5 +4,12 @@ from .pythonhelpers import (
     callpythonmaincode as callpythonmaincode,
     callpython_subprocess as callpython_subprocess,
     load_python_code as load_python_code,
-    loadmycode as loadmycode
+    loadmycode as loadmycode,
+    start_python_workers as start_python_workers,
+    stop_python_workers as stop_python_workers,
+    callpython_batch as callpython_batch,
+    acallpython as acallpython,
+    acallpythoncode as acallpythoncode,
+    callpython_future as callpython_future,
+    callpython_stream as callpython_stream
 )
@@ -0,0 +1,374 @@
+  # -*- coding: utf-8 -*-
+"""
+Fork server used to run student Python code without paying interpreter startup on every call.
+
+The server is a long-lived Python interpreter which waits for jobs on a Unix domain socket.
+For every job it forks a fresh child, so each run gets its own copy of the interpreter with
+isolated sys.argv, stdin, stdout, working directory, environment and module state.
+
+When this file is executed as a script it runs the server loop. When it is imported it
+provides the client side, the ForkServer class.
+
+Classes
+-------
+    - ForkServer: Starts the server process and runs scripts or code snippets in it.
+"""
+
+import os
+import sys
+import json
+import socket
+import subprocess
+import tempfile
+import threading
+import selectors
+import locale
+import shutil
+import time
+import signal
+import runpy
+import types
+import atexit
+import traceback
+
+
+_HEADER_SIZE = 8
+#Linux reports the peak RSS in kilobytes, macOS in bytes
+_RSS_SCALE = 1 if sys.platform == 'darwin' else 1024
+
+
+def _write_input(fd: int, data: bytes) -> None:
+    """Write the input to the child's stdin and close it."""
+    try:
+        with open(fd, 'wb', closefd=True) as f:
+            f.write(data)
+    except (BrokenPipeError, OSError):
+        pass
+
+
+class ForkServer:
+    """Client for the fork server process.
+
+    Parameters
+    ----------
+    preload : list[str], optional
+        Modules imported by the server before it starts forking, by default []
+
+    Notes
+    -----
+    The server is only available on platforms which support os.fork() and Unix domain sockets.
+    """
+
+    def __init__(self, preload:list[str]=[]) -> None:
+        self.preload:list[str] = list(preload)
+        self._tmpdir:str = tempfile.mkdtemp(prefix='amk_forkserver_')
+        self.address:str = os.path.join(self._tmpdir, 'server.sock')
+
+        #The socket is listening before the server starts, so jobs can be queued immediately
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        listener.bind(self.address)
+        listener.listen(128)
+        cmd_line:list[str] = [sys.executable, os.path.abspath(__file__), str(listener.fileno())] + preload
+        #The server exits when its stdin is closed, so it never outlives this process
+        self.process = subprocess.Popen(cmd_line, pass_fds=[listener.fileno()], stdin=subprocess.PIPE)
+        listener.close()
+
+    def alive(self) -> bool:
+        """Return True if the server process is still running."""
+        return self.process.poll() is None
+
+    def stop(self) -> None:
+        """Stop the server process and remove its socket."""
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def run(self, path:str='', code:str='', cmdline_args:list[str]=[], cwd:str='', input:str='', timeout:float=30, max_output:int=0) -> subprocess.CompletedProcess:
+        """Run a Python script or code snippet in a forked child.
+
+        Parameters
+        ----------
+        path : str, optional
+            Path to the script to execute, by default ''
+        code : str, optional
+            Code to execute when no path is given, by default ''
+        cmdline_args : list[str], optional
+            Command-line arguments passed to the code, by default []
+        cwd : str, optional
+            Working directory of the child, by default the current directory
+        input : str, optional
+            Input to provide to the executed code, by default ''
+        timeout : float, optional
+            Maximum time (in seconds) to allow the execution before timing out, by default 30
+        max_output : int, optional
+            Maximum number of bytes to read from stdout, 0 means no limit, by default 0.
+            If the child writes more, it is killed and max_output + 1 bytes are returned.
+
+        Returns
+        -------
+        subprocess.CompletedProcess
+            Result of the run, stdout is returned as bytes. The attributes wall_time (seconds) and
+            rusage (dictionary with user_time, system_time and max_rss) describe the resource usage of the child.
+
+        Raises
+        ------
+        TimeoutExpired
+            If the execution exceeds the specified timeout.
+        """
+        request:dict = {
+            'path': os.path.abspath(path) if path else '',
+            'code': code,
+            'args': list(cmdline_args),
+            'cwd': os.path.abspath(cwd or os.getcwd()),
+            'env': dict(os.environ),
+        }
+        payload:bytes = json.dumps(request).encode()
+        cmd_line:list[str] = [sys.executable, request['path'] or '-c'] + list(cmdline_args)
+        start:float = time.perf_counter()
+        deadline:float = time.monotonic() + timeout
+
+        stdin_r, stdin_w = os.pipe()
+        stdout_r, stdout_w = os.pipe()
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            conn.connect(self.address)
+            #The child writes its errors to our current stderr, which may have been redirected since the server started
+            socket.send_fds(conn, [len(payload).to_bytes(_HEADER_SIZE, 'big')], [stdin_r, stdout_w, 2])
+            conn.sendall(payload)
+        except:
+            conn.close()
+            for fd in (stdin_r, stdin_w, stdout_r, stdout_w):
+                os.close(fd)
+            raise
+        os.close(stdin_r)
+        os.close(stdout_w)
+
+        writer = threading.Thread(target=_write_input, args=(stdin_w, input.encode(locale.getpreferredencoding(False))), daemon=True)
+        writer.start()
+
+        #With a limit the output is read into a fixed-size buffer
+        output = bytearray(max_output + 1) if max_output else bytearray()
+        size:int = 0
+        status = bytearray()
+        with selectors.DefaultSelector() as selector:
+            selector.register(stdout_r, selectors.EVENT_READ)
+            selector.register(conn, selectors.EVENT_READ)
+            try:
+                while selector.get_map():
+                    remaining:float = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise subprocess.TimeoutExpired(cmd_line, timeout, output=bytes(output[:size]))
+                    for key, _ in selector.select(remaining):
+                        if key.fileobj == stdout_r:
+                            if max_output:
+                                count:int = os.readv(stdout_r, [memoryview(output)[size:]])
+                            else:
+                                chunk:bytes = os.read(stdout_r, 65536)
+                                output += chunk
+                                count = len(chunk)
+                            size += count
+                            if count == 0 or (max_output and size > max_output):
+                                selector.unregister(stdout_r)
+                            if max_output and size > max_output:
+                                #Ask the server to kill the child, the exit status is still reported
+                                conn.sendall(b'k')
+                        else:
+                            chunk = conn.recv(4096)
+                            status += chunk
+                            if not chunk or status.endswith(b'\n'):
+                                selector.unregister(conn)
+            finally:
+                #Closing the connection tells the server to kill a child which is still running
+                conn.close()
+                os.close(stdout_r)
+
+        wall_time:float = time.perf_counter() - start
+        writer.join()
+        try:
+            report:dict = json.loads(status)
+        except ValueError:
+            raise ChildProcessError('Fork server did not report the exit status of the child')
+
+        completed = subprocess.CompletedProcess(cmd_line, report['returncode'], bytes(output[:size]))
+        completed.wall_time = wall_time
+        completed.rusage = report.get('rusage')
+        return completed
+
+
+def _exit_code(code: object) -> int:
+    """Convert the argument of SystemExit into a process exit code."""
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+    print(code, file=sys.stderr)
+    return 1
+
+
+def _run_child(request: dict, stdin_fd: int, stdout_fd: int, stderr_fd: int) -> None:
+    """Run one job in a freshly forked child and exit."""
+    signal.set_wakeup_fd(-1)
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+    os.dup2(stdin_fd, 0)
+    os.dup2(stdout_fd, 1)
+    os.dup2(stderr_fd, 2)
+    os.close(stdin_fd)
+    os.close(stdout_fd)
+    os.close(stderr_fd)
+    sys.stdin = sys.__stdin__ = open(0, 'r', closefd=False)
+    sys.stdout = sys.__stdout__ = open(1, 'w', closefd=False)
+    sys.stderr = sys.__stderr__ = open(2, 'w', closefd=False)
+
+    os.chdir(request['cwd'])
+    env:dict = request['env']
+    for name in [name for name in os.environ if name not in env]:
+        del os.environ[name]
+    for name, value in env.items():
+        if os.environ.get(name) != value:
+            os.environ[name] = value
+
+    path:str = request['path']
+    code:int = 0
+    try:
+        if path:
+            sys.argv = [path] + request['args']
+            sys.path[0] = os.path.dirname(path)
+            runpy.run_path(path, run_name='__main__')
+        else:
+            sys.argv = ['-c'] + request['args']
+            sys.path[0] = ''
+            module = types.ModuleType('__main__')
+            sys.modules['__main__'] = module
+            exec(compile(request['code'], '<string>', 'exec'), module.__dict__)
+    except SystemExit as e:
+        code = _exit_code(e.code)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+
+    #Mimic normal interpreter shutdown: wait for threads and run atexit handlers
+    try:
+        for thread in threading.enumerate():
+            if thread is not threading.main_thread() and not thread.daemon:
+                thread.join()
+        atexit._run_exitfuncs()
+        sys.stdout.flush()
+        sys.stderr.flush()
+    except BaseException:
+        pass
+    os._exit(code)
+
+
+def _recv_exact(conn: socket.socket, size: int) -> bytes:
+    """Receive exactly size bytes from the connection."""
+    data = bytearray()
+    while len(data) < size:
+        chunk:bytes = conn.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError('Client closed the connection')
+        data += chunk
+    return bytes(data)
+
+
+def _serve(listener_fd: int) -> None:
+    """Accept jobs and fork a child for each of them."""
+    listener = socket.socket(fileno=listener_fd)
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda signum, frame: None)
+
+    children:dict[int, socket.socket] = {}
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    selector.register(wakeup_r, selectors.EVENT_READ)
+    selector.register(0, selectors.EVENT_READ)
+
+    while True:
+        for key, _ in selector.select():
+            if key.fileobj is listener:
+                conn, _ = listener.accept()
+                fds:list[int] = []
+                try:
+                    header, fds, _, _ = socket.recv_fds(conn, _HEADER_SIZE, 3)
+                    request:dict = json.loads(_recv_exact(conn, int.from_bytes(header, 'big')))
+                    if len(fds) != 3:
+                        raise ValueError('Expected stdin, stdout and stderr')
+                except (OSError, ValueError):
+                    for fd in fds:
+                        os.close(fd)
+                    conn.close()
+                    continue
+                pid:int = os.fork()
+                if pid == 0:
+                    os.close(wakeup_r)
+                    os.close(wakeup_w)
+                    selector.close()
+                    listener.close()
+                    conn.close()
+                    for other in children.values():
+                        other.close()
+                    _run_child(request, fds[0], fds[1], fds[2])
+                for fd in fds:
+                    os.close(fd)
+                children[pid] = conn
+                selector.register(conn, selectors.EVENT_READ, pid)
+            elif key.fileobj == wakeup_r:
+                os.read(wakeup_r, 4096)
+            elif key.fileobj == 0:
+                #The client closed our stdin, kill the remaining children and quit
+                for pid in children:
+                    try:
+                        os.kill(pid, signal.SIGKILL)
+                    except ProcessLookupError:
+                        pass
+                return
+            else:
+                #The client gave up on the job (timeout or error), kill the child
+                try:
+                    os.kill(key.data, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+                selector.unregister(key.fileobj)
+
+        #Reap finished children and report their exit status
+        while children:
+            try:
+                pid, status, rusage = os.wait4(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            conn = children.pop(pid)
+            try:
+                selector.unregister(conn)
+            except KeyError:
+                pass
+            try:
+                report:dict = {
+                    'returncode': os.waitstatus_to_exitcode(status),
+                    'rusage': {'user_time': rusage.ru_utime, 'system_time': rusage.ru_stime, 'max_rss': rusage.ru_maxrss * _RSS_SCALE},
+                }
+                conn.sendall(json.dumps(report).encode() + b'\n')
+            except OSError:
+                pass
+            conn.close()
+
+
+if __name__ == '__main__':
+    import gc
+
+    for module_name in sys.argv[2:]:
+        try:
+            __import__(module_name)
+        except ImportError:
+            pass
+    #Warm up the compiler and keep the loaded objects out of the children's garbage collection
+    compile('pass', '<string>', 'exec')
+    gc.freeze()
+    _serve(int(sys.argv[1]))
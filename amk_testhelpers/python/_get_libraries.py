@@ -2,24 +2,131 @@
 This module is used to get the allowed libraries from the file allowed_libraries.txt
 Execute command 'allowed_libraries' to print the allowed libraries
 
+The file is read only once per process and kept in a cache together with an index of
+the top-level package names. The cache is refreshed when the file changes.
 """
 
 import os
+import sys
+import functools
+
+script_directory = os.path.dirname(os.path.abspath(__file__))
+ALLOWED_LIBRARIES_FILE = os.path.join(script_directory, 'allowed_libraries.txt')
+
+#Loaded library files: path -> ((mtime, size), lines, index)
+_libraries_cache:dict[str, tuple[tuple[int, int], list[str], frozenset[str]]] = {}
+
+
+def _load_libraries(file_path:str=ALLOWED_LIBRARIES_FILE) -> tuple[list[str], frozenset[str]]:
+    """Load a library list file.
+
+    Parameters
+    ----------
+    file_path : str, optional
+        Path to the library list, by default the allowed_libraries.txt of this package.
+
+    Returns
+    -------
+    tuple[list[str], frozenset[str]]
+        The lines of the file and an index of the top-level package names listed in it.
+
+    Raises
+    ------
+    FileNotFoundError
+        If the file is not found at the specified path.
+
+    Notes
+    -----
+    Distribution names are indexed also in the form used in imports,
+    for example 'importlib-metadata' as 'importlib_metadata' and 'Jinja2' as 'jinja2'.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f'File not found at the specified path: {file_path}')
+
+    key:tuple[int, int] = (stat.st_mtime_ns, stat.st_size)
+    cached = _libraries_cache.get(file_path)
+    if cached is not None and cached[0] == key:
+        return cached[1], cached[2]
+
+    with open(file_path, 'r') as f:
+        lines:list[str] = f.readlines()
+
+    index:set[str] = set()
+    for line in lines:
+        name:str = line.strip().split('.')[0]
+        if name:
+            index.update((name, name.replace('-', '_'), name.lower().replace('-', '_')))
+
+    _libraries_cache[file_path] = (key, lines, frozenset(index))
+    return lines, frozenset(index)
+
+
+def _allowed_libraries() -> frozenset[str]:
+    """Return the top-level package names which are allowed in student code.
+
+    Returns
+    -------
+    frozenset[str]
+        Names listed in allowed_libraries.txt and the standard library modules of this interpreter.
+    """
+    _, index = _load_libraries(ALLOWED_LIBRARIES_FILE)
+    return index | _standard_libraries()
+
+
+@functools.lru_cache(maxsize=None)
+def _standard_libraries() -> frozenset[str]:
+    """Return the names of the standard library and built-in modules of this interpreter."""
+    return frozenset(sys.stdlib_module_names) | frozenset(sys.builtin_module_names)
+
+
+@functools.lru_cache(maxsize=128)
+def _denied_index(denied_libraries:tuple[str, ...]) -> frozenset[str]:
+    """Return an index of denied module names.
+
+    Parameters
+    ----------
+    denied_libraries : tuple[str, ...]
+        Denied modules, for example ('numpy', 'matplotlib.pyplot').
+
+    Returns
+    -------
+    frozenset[str]
+        The denied module names without surrounding whitespace.
+    """
+    return frozenset(name.strip() for name in denied_libraries if name.strip())
+
+
+def _isdenied(module:str, denied:frozenset[str]) -> bool:
+    """Return True if the module or any of its parent packages is denied.
+
+    Parameters
+    ----------
+    module : str
+        Imported module, for example 'matplotlib.pyplot'.
+    denied : frozenset[str]
+        Index returned by _denied_index().
+
+    Returns
+    -------
+    bool
+        True if 'matplotlib.pyplot' or 'matplotlib' is denied.
+    """
+    parts:list[str] = module.split('.')
+    return any('.'.join(parts[:i]) in denied for i in range(1, len(parts) + 1))
+
 
 def print_allowed_libraries() -> None:
     """Print the allowed libraries from the file allowed_libraries.txt
 
     """
-    script_directory = os.path.dirname(os.path.abspath(__file__))
-    ALLOWED_LIBRARIES_FILE = os.path.join(script_directory, 'allowed_libraries.txt')
-    
     lines: list[str] = []
-    if os.path.exists(ALLOWED_LIBRARIES_FILE):
-        with open(ALLOWED_LIBRARIES_FILE, 'r') as f:
-            lines = f.readlines()
-    else:
+    try:
+        lines, _ = _load_libraries(ALLOWED_LIBRARIES_FILE)
+    except FileNotFoundError:
         print(f"File not found")
-    
+
     print('*'*32)
     print('These libraries are allowed: ')
     print('-'*32)
@@ -27,4 +134,4 @@ def print_allowed_libraries() -> None:
         line.strip()
         print(line,end='')
     print()
-    print('-'*32)
\ No newline at end of file
+    print('-'*32)
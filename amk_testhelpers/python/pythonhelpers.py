@@ -8,6 +8,7 @@ It includes functions for executing code, and interacting with subprocesses.
 Functions
 ---------
     - _read_file(): Read the contents of a file located at the specified file path.
+    - _parseimports(): Find the modules imported by Python source code.
     - _checkimports(): Check the import statements in the code.
     - _checkallowedlibraries(): Check student imports against the list of allowed libraries and print any missing ones.
     - _checkdeniedlibraries(): Check student imports against the list of denied libraries and raise an exception if any are found.
@@ -15,7 +16,13 @@ Functions
     - callpythonmaincode(): Executes Python code snippets along with the main code.
     - loadmycode(): Loads the student's code.
     - callpython(): Executes the main Python code.
+    - callpython_stream(): Executes the main Python code and yields the output line by line.
+    - acallpythoncode(), acallpython(): asyncio counterparts of callpythoncode() and callpython().
+    - callpython_batch(): Executes the main Python code once for every (cmdline_args, input) pair.
     - callpython_subprocess(): Runs the main Python code in a separate thread.
+    - callpython_future(): Runs the main Python code in the shared background executor and returns a Future.
+    - start_python_workers(): Starts a pre-started worker interpreter (fork server) used by the call functions.
+    - stop_python_workers(): Stops the worker interpreter.
     - load_python_code(): This function is deprecated and will be removed in the future. Use loadmycode() instead
 """
 import sys
@@ -23,6 +30,25 @@ import subprocess
 import os
 import threading
 import glob
+import socket
+import atexit
+import concurrent.futures
+import tempfile
+import ast
+from collections.abc import Iterator
+
+from amk_testhelpers._process import _arun, _output, _run, _stream, run_in_background
+from amk_testhelpers.python._get_libraries import _allowed_libraries, _denied_index, _isdenied
+
+
+#Longest code passed with 'python -c' in bytes, one command-line argument is limited to 128 kB on Linux
+_MAX_INLINE_CODE = 100000
+
+#Imports found in student files: path -> ((mtime, size), imports)
+_imports_cache:dict[str, tuple[tuple[int, int], list[str]]] = {}
+
+_forkserver = None
+_forkserver_lock = threading.Lock()
 
 
 def _read_file(file_path: str) -> list[str]:
@@ -53,6 +79,56 @@ def _read_file(file_path: str) -> list[str]:
     return contents
 
 
+def _parseimports(source: bytes) -> list[str]:
+    """
+    Find the modules imported by Python source code.
+
+    Parameters
+    ----------
+    source : bytes
+        The source code to analyze.
+
+    Returns
+    -------
+    list[str]
+        Names of the imported modules (for example 'os' or 'sklearn.decomposition') in the order of appearance.
+
+    Notes
+    -----
+    The source is parsed with the 'ast' module, so imports inside functions, classes and conditional blocks
+    are found as well as '__import__('name')' and 'importlib.import_module('name')' calls with a literal name.
+    Relative imports refer to the student's own modules and are ignored.
+    If the source can't be parsed, the lines starting with 'import' or 'from' are used instead.
+    """
+    names:list[str] = []
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        for line in source.decode('latin1').splitlines():
+            words:list[str] = line.split()
+            if len(words) > 1 and words[0] == 'import':
+                names.extend(part.split()[0] for part in line.strip()[len('import'):].split(',') if part.strip())
+            elif len(words) > 1 and words[0] == 'from' and not words[1].startswith('.'):
+                names.append(words[1])
+        return list(dict.fromkeys(names))
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.level == 0 and node.module:
+                names.append(node.module)
+        elif isinstance(node, ast.Call) and node.args:
+            func = node.func
+            func_name:str = func.id if isinstance(func, ast.Name) else func.attr if isinstance(func, ast.Attribute) else ''
+            argument = node.args[0]
+            if func_name in ('__import__', 'import_module') and isinstance(argument, ast.Constant) \
+                    and isinstance(argument.value, str) and argument.value and not argument.value.startswith('.'):
+                names.append(argument.value)
+
+    return list(dict.fromkeys(names))
+
+
 def _checkimpors() -> list[str]:
     """
     Check imports in a Python file located in the current directory.
@@ -60,23 +136,38 @@ def _checkimpors() -> list[str]:
     Returns
     -------
     list[str]
-        A list of import statements found in the first Python file within the 'src' directory.
+        Names of the modules imported by the first Python file within the 'src' directory.
 
     Notes
     -----
-    This function checks for import statements in the first Python file found within the 'src' directory.
-    It returns a list of import statements found in the file. Each import statement is represented as a string.
+    This function checks for imports in the first Python file found within the 'src' directory.
+    The file is parsed only once, the result is cached by the path, modification time and size of the file.
+    Modules which are the student's own files in the 'src' directory are left out.
 
     """
     
     module_name = glob.glob(os.getcwd() + '/src/*.py')
     path = module_name[0]
 
-    imports_file:list[str] = _read_file(path)
+    stat = os.stat(path)
+    key:tuple[int, int] = (stat.st_mtime_ns, stat.st_size)
+    cached = _imports_cache.get(path)
+    if cached is not None and cached[0] == key:
+        imports:list[str] = cached[1]
+    else:
+        try:
+            with open(path, 'rb') as file:
+                source:bytes = file.read()
+        except FileNotFoundError:
+            raise FileNotFoundError(f'File not found at the specified path: {path}')
+        imports = _parseimports(source)
+        _imports_cache[path] = (key, imports)
 
-    imports:list[str] = [line.strip() for line in imports_file if line.startswith('import') or line.startswith('from')]
+    src_directory:str = os.path.dirname(path)
+    local_modules:set[str] = {os.path.splitext(os.path.basename(name))[0] for name in module_name}
 
-    return imports
+    return [name for name in imports
+            if name.split('.')[0] not in local_modules and not os.path.isdir(os.path.join(src_directory, name.split('.')[0]))]
 
 
 def _checkallowedlibraries() -> None:
@@ -85,6 +176,10 @@ def _checkallowedlibraries() -> None:
     specified in the 'allowed_libraries.txt' file. If any imported libraries are not found in the
     allowed list, they are printed as missing.
 
+    The top-level package of every import must match an allowed name exactly. The standard library
+    of the checking machine is always allowed. The allowed list is loaded only once and reloaded
+    when the file changes.
+
     Returns
     -------
     None
@@ -92,18 +187,13 @@ def _checkallowedlibraries() -> None:
     Examples
     --------
     WARNING!! These libraries is not installed in the checking machine:
-    ['import os', 'from sklearn.decomposition import PCA']
+    ['pygame', 'sklearn.decomposition']
     """
     imports:list[str] = _checkimpors()
-    
-    script_directory:str = os.path.dirname(os.path.abspath(__file__))
-    file_path:str = os.path.join(script_directory, 'allowed_libraries.txt')
 
-    allowed_libraries_file:list[str] = _read_file(file_path)
+    allowed:frozenset[str] = _allowed_libraries()
 
-    lines:list[str] = [line.strip() for line in allowed_libraries_file]
-    
-    missing_libraries:list[str] = [name for name in imports if not any(item in name for item in lines)]
+    missing_libraries:list[str] = [name for name in imports if name.split('.')[0] not in allowed]
     if missing_libraries:
         print('*'*40)
         print('WARNING!! These libraries is not installed in the checking machine:')
@@ -116,7 +206,8 @@ def _checkdeniedlibraries(denied_libraries: list[str]) -> None:
     This function checks the libraries imported by the student against the list of denied libraries.
 
     Specified in the 'denied_libraries' parameter. If any imported libraries are found in the denied list,
-    an exception is raised.
+    an exception is raised. Denying a package denies also its submodules, so 'matplotlib' denies
+    'matplotlib.pyplot' but 'os' does not deny 'cosmos'.
 
     Parameters
     ----------
@@ -130,12 +221,14 @@ def _checkdeniedlibraries(denied_libraries: list[str]) -> None:
     """
     imports:list[str] = _checkimpors()
 
-    deniedlibs:list[str] = [name for name in imports if any(item in name for item in denied_libraries)]
+    denied:frozenset[str] = _denied_index(tuple(denied_libraries))
+
+    deniedlibs:list[str] = [name for name in imports if _isdenied(name, denied)]
     if deniedlibs:
         raise Exception('You are not allowed to use the following libraries on this task: ' + str(deniedlibs))
 
 
-def callpythoncode(code:str='', cmdline_args:list[str] =[], input:str='', timeout:int=30, denied_libraries:list[str] =[]) -> str:
+def callpythoncode(code:str='', cmdline_args:list[str] =[], input:str='', timeout:int=30, denied_libraries:list[str] =[], in_memory:bool=False, max_output:int=0) -> str:
     """
     Execute the provided Python code in a separate process.
 
@@ -149,11 +242,17 @@ def callpythoncode(code:str='', cmdline_args:list[str] =[], input:str='', timeou
         Input to provide to the executed code (default '').
     timeout : int, optional
         Maximum time (in seconds) to allow the execution before timing out (default 30).
+    in_memory : bool, optional
+        Deliver the code to the interpreter without writing it to disk (default False).
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit (default 0).
 
     Returns
     -------
     str
         Standard output generated by the executed code.
+        If the output limit is reached, the code is stopped and the returned output has 'truncated' set to True.
+        The exit status, wall-clock time, CPU times and peak RSS of the run are available as attributes, see ProcessOutput.
 
     Raises
     -------
@@ -165,22 +264,26 @@ def callpythoncode(code:str='', cmdline_args:list[str] =[], input:str='', timeou
     The provided Python code is executed in a separate process. 
     Any standard output generated by the executed code is returned as a string.
     If the execution times out, a TimeoutExpired exception is raised.
+
+    By default the code is written to a uniquely named file 'tests/my_test_code_*.py' which is removed
+    after the run, so concurrent calls do not overwrite each other's code.
+    With 'in_memory=True' the code is passed with 'python -c' (or directly to the worker interpreter),
+    so nothing is written to disk. In that mode '__file__' is not defined and the 'src' directory is
+    the first entry of 'sys.path'.
     """
 
     path:str = os.getcwd()
 
-    _checkallowedlibraries()
-    if denied_libraries:
-        _checkdeniedlibraries(denied_libraries=denied_libraries)
+    workers = _python_workers()
+
+    cmd_line, testcodefile = _preparepythoncode(code, cmdline_args, denied_libraries, in_memory, inline=bool(workers))
 
-    testcodefile:str = path + '/tests/my_test_code.py'
-    f=open(testcodefile, "w")
-    f.write(code)
-    f.close()
-    
-    cmd_line:list[str] = [sys.executable, testcodefile,]+cmdline_args
     try:
-        rc = subprocess.run(cmd_line, cwd=path+'/src', stdout=subprocess.PIPE, text=True, input=input, timeout=timeout)
+        if workers:
+            rc = workers.run(path=testcodefile, code=code, cmdline_args=cmdline_args, cwd=path+'/src', input=input, timeout=timeout, max_output=max_output)
+            rc.stdout = _output(rc.stdout, max_output, rc.returncode, rc.wall_time, rc.rusage)
+        else:
+            rc = _run(cmd_line, cwd=path+'/src', input=input, timeout=timeout, max_output=max_output)
     except subprocess.TimeoutExpired:
         print('Timeout expired!')
         return ''
@@ -189,13 +292,97 @@ def callpythoncode(code:str='', cmdline_args:list[str] =[], input:str='', timeou
         cmd_line_str:str = ' '.join(cmd_line)
         rc = subprocess.run(cmd_line_str, cwd=path+'/src', stdout=subprocess.PIPE, universal_newlines=True, input=input, timeout=timeout)
         print("Fallback completed, don't worry")
-
-    os.remove(testcodefile)    
+    finally:
+        if testcodefile:
+            os.remove(testcodefile)
 
     return rc.stdout
 
+async def acallpythoncode(code:str='', cmdline_args:list[str]=[], input:str='', timeout:int=30, denied_libraries:list[str]=[], in_memory:bool=False) -> str:
+    """
+    Execute the provided Python code in a separate process without blocking the event loop.
+
+    This is the asyncio counterpart of callpythoncode(). The process is started with
+    asyncio.create_subprocess_exec() and it is killed if the call times out or the awaiting task is cancelled.
+
+    Parameters
+    ----------
+    code : str, optional
+        Python code to execute.
+    cmdline_args : list[str], optional
+        Command-line arguments to pass to the executed code (default []).
+    input : str, optional
+        Input to provide to the executed code (default '').
+    timeout : int, optional
+        Maximum time (in seconds) to allow the execution before timing out (default 30).
+    denied_libraries : list[str], optional
+        List of denied libraries (default []).
+    in_memory : bool, optional
+        Deliver the code to the interpreter without writing it to disk (default False).
+
+    Returns
+    -------
+    str
+        Standard output generated by the executed code, or '' if the execution timed out.
+
+    Examples
+    --------
+    >>> outputs = await asyncio.gather(*(acallpythoncode('print(input())', input=f'{i}\\n') for i in range(100)))
+    """
+    path:str = os.getcwd()
+
+    cmd_line, testcodefile = _preparepythoncode(code, cmdline_args, denied_libraries, in_memory)
+
+    try:
+        return await _arun(cmd_line, cwd=path+'/src', input=input, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print('Timeout expired!')
+        return ''
+    finally:
+        if testcodefile:
+            os.remove(testcodefile)
+
+
+def _preparepythoncode(code:str, cmdline_args:list[str]=[], denied_libraries:list[str]=[], in_memory:bool=False, inline:bool=False) -> tuple[list[str], str]:
+    """
+    Check the student's imports and prepare the command line for running a code snippet.
+
+    Parameters
+    ----------
+    code : str
+        Python code to execute.
+    cmdline_args : list[str], optional
+        Command-line arguments to pass to the executed code (default []).
+    denied_libraries : list[str], optional
+        List of denied libraries (default []).
+    in_memory : bool, optional
+        Pass the code with 'python -c' instead of a temporary file (default False).
+    inline : bool, optional
+        The code is passed to the worker interpreter, so its length is not limited (default False).
+
+    Returns
+    -------
+    tuple[list[str], str]
+        The command line and the temporary code file, or '' if no file was written.
+        The caller must remove the file after the run.
+    """
+    _checkallowedlibraries()
+    if denied_libraries:
+        _checkdeniedlibraries(denied_libraries=denied_libraries)
+
+    #Very long code does not fit into a single command-line argument
+    if in_memory and (inline or len(os.fsencode(code)) < _MAX_INLINE_CODE):
+        return [sys.executable, '-c', code]+cmdline_args, ''
+
+    fd, testcodefile = tempfile.mkstemp(prefix='my_test_code_', suffix='.py', dir=os.getcwd() + '/tests')
+    with os.fdopen(fd, 'w') as f:
+        f.write(code)
+
+    return [sys.executable, testcodefile,]+cmdline_args, testcodefile
+
+
 #Run my_code.py and additional code
-def callpythonmaincode(code:str='', cmdline_args:list[str]=[], input:str='', timeout:int=30) -> str:
+def callpythonmaincode(code:str='', cmdline_args:list[str]=[], input:str='', timeout:int=30, in_memory:bool=False, max_output:int=0) -> str:
     """Execute the provided Python code along with the main code in a separate process.
 
         This function first loads the main Python code from the file specified by 'loadmycode()',
@@ -212,6 +399,10 @@ def callpythonmaincode(code:str='', cmdline_args:list[str]=[], input:str='', tim
         Input to provide to the executed code, by default ''
     timeout : int, optional
         Maximum time (in seconds) to allow the execution before timing out, by default 30
+    in_memory : bool, optional
+        Deliver the code to the interpreter without writing it to disk, by default False
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit, by default 0
 
     Returns
     -------
@@ -233,7 +424,7 @@ def callpythonmaincode(code:str='', cmdline_args:list[str]=[], input:str='', tim
     """
     my_code:str = loadmycode()
 
-    return callpythoncode(code=my_code+code, cmdline_args=cmdline_args, input=input, timeout=timeout)
+    return callpythoncode(code=my_code+code, cmdline_args=cmdline_args, input=input, timeout=timeout, in_memory=in_memory, max_output=max_output)
 
 #Load student code
 def loadmycode(codefile:str='') -> str:
@@ -292,7 +483,7 @@ def loadmycode(codefile:str='') -> str:
     
 
 #Run my_code.py
-def callpython(cmdline_args:list[str] = [], input:str='', timeout:int=30,denied_libs:list[str] = []) -> str:
+def callpython(cmdline_args:list[str] = [], input:str='', timeout:int=30,denied_libs:list[str] = [], max_output:int=0) -> str:
     """
     Execute a Python script located in the 'src' directory with specified command-line arguments and input.
 
@@ -309,18 +500,167 @@ def callpython(cmdline_args:list[str] = [], input:str='', timeout:int=30,denied_
         Maximum time (in seconds) to allow the script execution before timing out (default 30).
     denied_libs : list[str], optional
         List of denied libraries. If provided, the function checks if the script uses any of these libraries (default []). 
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit (default 0).
 
     Returns
     -------
     str
         Standard output generated by the executed script.
+        If the output limit is reached, the script is stopped and the returned output has 'truncated' set to True.
+        The exit status, wall-clock time, CPU times and peak RSS of the run are available as attributes, see ProcessOutput.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no Python file is found in the 'src' directory.
+    """
+
+    src_directory, current_file = _preparepython(denied_libs)
+
+    return _runpython(src_directory, current_file, cmdline_args, input, timeout, max_output)
+
+
+#Run my_code.py with many inputs
+def callpython_batch(cases:list[tuple[list[str], str]], timeout:int=30, denied_libs:list[str]=[], max_workers:int|None=None) -> list[str]:
+    """
+    Execute the Python script located in the 'src' directory once for every test case.
+
+    The shared setup (library checks and locating the script) is done only once and
+    the cases are executed concurrently. The results are returned in the same order as the cases.
+
+    Parameters
+    ----------
+    cases : list[tuple[list[str], str]]
+        List of (cmdline_args, input) pairs, one for every execution.
+    timeout : int, optional
+        Maximum time (in seconds) to allow one execution before timing out (default 30).
+    denied_libs : list[str], optional
+        List of denied libraries. If provided, the function checks if the script uses any of these libraries (default []).
+    max_workers : int | None, optional
+        Maximum number of concurrent executions, by default the ThreadPoolExecutor default.
+
+    Returns
+    -------
+    list[str]
+        Standard output of every execution, in the order of the cases.
 
     Raises
     ------
     FileNotFoundError
         If no Python file is found in the 'src' directory.
+
+    Examples
+    --------
+    >>> outputs = callpython_batch([(['1', '2'], ''), ([], '5\\n')], max_workers=4)
+    """
+    src_directory, current_file = _preparepython(denied_libs)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_runpython, src_directory, current_file, cmdline_args, input, timeout) for cmdline_args, input in cases]
+        return [future.result() for future in futures]
+
+
+def callpython_stream(cmdline_args:list[str]=[], input:str='', timeout:int=30, denied_libs:list[str]=[]) -> Iterator[str]:
     """
+    Execute the Python script located in the 'src' directory and yield its output line by line.
 
+    The lines are yielded as soon as the script prints them, so a test can stop reading as soon as
+    the expected line has appeared or a mismatch is certain. The script is killed when the
+    iteration is stopped, so a program which prints the right answer and then hangs does not
+    use up the whole timeout.
+
+    Parameters
+    ----------
+    cmdline_args : list[str], optional
+        Command-line arguments to pass to the executed script (default []).
+    input : str, optional
+        Input to provide to the executed script (default '').
+    timeout : int, optional
+        Maximum time (in seconds) for the whole run (default 30).
+    denied_libs : list[str], optional
+        List of denied libraries. If provided, the function checks if the script uses any of these libraries (default []).
+
+    Returns
+    -------
+    Iterator[str]
+        Lines of the standard output, including the line terminator.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no Python file is found in the 'src' directory.
+
+    Examples
+    --------
+    >>> for line in callpython_stream(input='5\\n'):
+    ...     if 'Result' in line:
+    ...         break
+    """
+    src_directory, current_file = _preparepython(denied_libs)
+
+    #Python buffers output written to a pipe, the lines are needed as soon as they are printed
+    env:dict[str, str] = dict(os.environ, PYTHONUNBUFFERED='1')
+    return _stream([sys.executable, current_file,]+cmdline_args, cwd=src_directory, input=input, timeout=timeout, env=env)
+
+
+async def acallpython(cmdline_args:list[str]=[], input:str='', timeout:int=30, denied_libs:list[str]=[]) -> str:
+    """
+    Execute the Python script located in the 'src' directory without blocking the event loop.
+
+    This is the asyncio counterpart of callpython(). The process is started with
+    asyncio.create_subprocess_exec() and it is killed if the call times out or the awaiting task is cancelled,
+    so a grading driver can keep many runs in flight on one event loop.
+
+    Parameters
+    ----------
+    cmdline_args : list[str], optional
+        Command-line arguments to pass to the executed script (default []).
+    input : str, optional
+        Input to provide to the executed script (default '').
+    timeout : int, optional
+        Maximum time (in seconds) to allow the script execution before timing out (default 30).
+    denied_libs : list[str], optional
+        List of denied libraries. If provided, the function checks if the script uses any of these libraries (default []).
+
+    Returns
+    -------
+    str
+        Standard output generated by the executed script, or '' if the execution timed out.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no Python file is found in the 'src' directory.
+    """
+    src_directory, current_file = _preparepython(denied_libs)
+
+    try:
+        return await _arun([sys.executable, current_file,]+cmdline_args, cwd=src_directory, input=input, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        print('Timeout expired!')
+        return ''
+
+
+def _preparepython(denied_libs:list[str]=[]) -> tuple[str, str]:
+    """
+    Check the student's imports and locate the Python script in the 'src' directory.
+
+    Parameters
+    ----------
+    denied_libs : list[str], optional
+        List of denied libraries (default []).
+
+    Returns
+    -------
+    tuple[str, str]
+        The 'src' directory and the name of the script in it.
+
+    Raises
+    ------
+    FileNotFoundError
+        If no Python file is found in the 'src' directory.
+    """
     _checkallowedlibraries()
     if denied_libs:
         _checkdeniedlibraries(denied_libraries=denied_libs)
@@ -330,11 +670,42 @@ def callpython(cmdline_args:list[str] = [], input:str='', timeout:int=30,denied_
     py_file:list[str] = [entry.name for entry in os.scandir(src_directory) if entry.name.endswith('.py')]
     if not py_file:
         raise FileNotFoundError(f'Python file not found in the src directory: {src_directory}')
-    
-    current_file:str = py_file[0]
+
+    return src_directory, py_file[0]
+
+
+def _runpython(src_directory:str, current_file:str, cmdline_args:list[str]=[], input:str='', timeout:int=30, max_output:int=0) -> str:
+    """
+    Run one Python script and return its standard output.
+
+    Parameters
+    ----------
+    src_directory : str
+        Directory of the script, used as the working directory.
+    current_file : str
+        Name of the script.
+    cmdline_args : list[str], optional
+        Command-line arguments to pass to the executed script (default []).
+    input : str, optional
+        Input to provide to the executed script (default '').
+    timeout : int, optional
+        Maximum time (in seconds) to allow the script execution before timing out (default 30).
+    max_output : int, optional
+        Maximum number of bytes of output to capture, 0 means no limit (default 0).
+
+    Returns
+    -------
+    str
+        Standard output generated by the executed script, or '' if the execution timed out.
+    """
     cmd_line:list[str] = [sys.executable, current_file,]+cmdline_args
     try:
-        rc = subprocess.run(cmd_line, cwd=src_directory, stdout=subprocess.PIPE, text=True, input=input, timeout=timeout)
+        workers = _python_workers()
+        if workers:
+            rc = workers.run(path=os.path.join(src_directory, current_file), cmdline_args=cmdline_args, cwd=src_directory, input=input, timeout=timeout, max_output=max_output)
+            rc.stdout = _output(rc.stdout, max_output, rc.returncode, rc.wall_time, rc.rusage)
+        else:
+            rc = _run(cmd_line, cwd=src_directory, input=input, timeout=timeout, max_output=max_output)
     except subprocess.TimeoutExpired:
         print('Timeout expired!')
         return ''
@@ -348,7 +719,6 @@ def callpython(cmdline_args:list[str] = [], input:str='', timeout:int=30,denied_
     return rc.stdout
 
 
-
 #Run my_code.py in separate thread
 def callpython_subprocess(cmdline_args:list[str]=[], input:str='', timeout:int=30) -> threading.Thread:
     """
@@ -378,11 +748,131 @@ def callpython_subprocess(cmdline_args:list[str]=[], input:str='', timeout:int=3
     'join' method of the returned Thread object to wait for the script execution to finish if needed.
     Any exceptions that occur during the script execution will not be raised immediately in the
     main thread but can be handled by checking the status of the Thread object.
+
+    The output of the script is not available from the Thread object. Use callpython_future() to get
+    the output and to limit the number of concurrent runs.
     """
     th = threading.Thread(target=callpython, args=(cmdline_args , input ,timeout))
     th.start()
     return th
 
+
+#Run my_code.py in the background
+def callpython_future(cmdline_args:list[str]=[], input:str='', timeout:int=30, denied_libs:list[str]=[]) -> concurrent.futures.Future:
+    """
+    Execute the Python script located in the 'src' directory in the background.
+
+    The run is executed by an executor shared by the whole process, so the number of
+    concurrent background runs is bounded (see set_max_background_workers()).
+
+    Parameters
+    ----------
+    cmdline_args : list[str], optional
+        Command-line arguments to pass to the executed script (default []).
+    input : str, optional
+        Input to provide to the executed script (default '').
+    timeout : int, optional
+        Maximum time (in seconds) to allow the script execution before timing out (default 30).
+    denied_libs : list[str], optional
+        List of denied libraries. If provided, the function checks if the script uses any of these libraries (default []).
+
+    Returns
+    -------
+    concurrent.futures.Future
+        Future holding the standard output of the script, or the exception raised by the run.
+
+    Examples
+    --------
+    >>> server = callpython_future(['server', '8080'])
+    >>> client_output = callpython(['client', '8080'])
+    >>> server_output = server.result()
+    """
+    return run_in_background(callpython, cmdline_args, input, timeout, denied_libs)
+
+
+def start_python_workers(preload:list[str]=[]) -> bool:
+    """
+    Start a pre-started worker interpreter which runs the student code for the call functions.
+
+    When the worker is running, callpython() and callpythoncode() fork a copy of the already started
+    interpreter for every call instead of starting a new Python process. Every run still gets its own
+    sys.argv, stdin, stdout, working directory, environment and module state.
+
+    Parameters
+    ----------
+    preload : list[str], optional
+        Modules imported once by the worker before forking, for example ['numpy'] (default []).
+
+    Returns
+    -------
+    bool
+        True if the worker is running, False if the platform does not support it.
+
+    Notes
+    -----
+    The worker requires os.fork() and Unix domain sockets, so it is not available on Windows.
+    There the call functions keep starting a new process for every call.
+    Setting the environment variable AMK_PYTHON_WORKERS=1 starts the worker automatically on the first call.
+
+    Examples
+    --------
+    >>> class Tests(unittest.TestCase):
+    ...     @classmethod
+    ...     def setUpClass(cls):
+    ...         start_python_workers()
+    ...     @classmethod
+    ...     def tearDownClass(cls):
+    ...         stop_python_workers()
+    """
+    global _forkserver
+
+    if not hasattr(os, 'fork') or not hasattr(socket, 'AF_UNIX'):
+        print('Python workers are not supported on this platform, running without them.')
+        return False
+
+    with _forkserver_lock:
+        if _forkserver is None:
+            atexit.register(stop_python_workers)
+        elif _forkserver.alive():
+            return True
+        else:
+            preload = preload or _forkserver.preload
+            _forkserver.stop()
+        from amk_testhelpers.python._forkserver import ForkServer
+        _forkserver = ForkServer(preload=preload)
+    return True
+
+
+def stop_python_workers() -> None:
+    """
+    Stop the worker interpreter started by start_python_workers().
+
+    After this the call functions start a new Python process for every call again.
+    """
+    global _forkserver
+
+    with _forkserver_lock:
+        if _forkserver is not None:
+            atexit.unregister(stop_python_workers)
+            _forkserver.stop()
+            _forkserver = None
+
+
+def _python_workers():
+    """
+    Return the running worker interpreter or None if the workers are not in use.
+
+    The worker is started automatically if the environment variable AMK_PYTHON_WORKERS is set,
+    and restarted if it has died.
+    """
+    if _forkserver is not None and _forkserver.alive():
+        return _forkserver
+    if _forkserver is not None or os.environ.get('AMK_PYTHON_WORKERS', '0') not in ('', '0'):
+        if start_python_workers():
+            return _forkserver
+    return None
+
+
 def load_python_code() -> str:
     """This function is deprecated and will be removed in the future. Use loadmycode() instead.
 
@@ -12,7 +12,7 @@ setup(
     long_description=long_description,
     long_description_content_type="text/markdown",
     packages=find_packages(),
-    package_data={'': ['python/allowed_libraries.txt','python/__init__.pyi','cpp/__init__.pyi','dotnet/__init__.pyi','__init__.pyi']},
+    package_data={'': ['python/allowed_libraries.txt','python/__init__.pyi','cpp/__init__.pyi','cpp/include/amk_harness.h','dotnet/__init__.pyi','__init__.pyi']},
     license="MIT",
     entry_points={
         "console_scripts": [